@@ -4,6 +4,7 @@ REST API endpoints for transactions, anomalies, and dashboard data
 """
 
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from datetime import datetime, timedelta
 import asyncio
@@ -737,7 +738,7 @@ async def generate_pdf_report(
         
         # Generate PDF
         logger.info("Calling PDF service to generate report")
-        pdf_bytes = pdf_service.generate_analytics_report(data, ai_analysis)
+        pdf_bytes = await pdf_service.generate_analytics_report_async(data, ai_analysis)
         logger.info(f"PDF generated successfully: {len(pdf_bytes)} bytes")
         
         # Encode PDF as base64 for JSON response
@@ -762,6 +763,61 @@ async def generate_pdf_report(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/reports/generate-pdf/batch", response_model=APIResponse)
+async def generate_pdf_reports_batch(
+    reports: List[dict],
+    include_ai_analysis: bool = False
+):
+    """Generate several PDF reports at once, rendered in parallel worker processes"""
+    if not reports:
+        raise HTTPException(status_code=400, detail="No reports requested")
+    if len(reports) > 20:
+        raise HTTPException(status_code=400, detail="At most 20 reports per batch")
+    
+    try:
+        from app.services.pdf_service import pdf_service
+        
+        ai_analyses = [None] * len(reports)
+        if include_ai_analysis:
+            from app.services.openai_service import openai_service
+            ai_analyses = await asyncio.gather(*(
+                openai_service.generate_custom_content(
+                    f"Generate a concise executive summary for financial anomaly detection report with {data.get('total_transactions', 0)} transactions and {data.get('anomalies_detected', 0)} anomalies.",
+                    max_tokens=800
+                )
+                for data in reports
+            ))
+        
+        timestamp = datetime.utcnow().isoformat()
+        for data in reports:
+            data['timestamp'] = timestamp
+        
+        pdfs = await pdf_service.generate_many_async(list(zip(reports, ai_analyses)))
+        logger.info(f"Generated {len(pdfs)} PDF reports")
+        
+        filename_stamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+        return APIResponse(
+            success=True,
+            message=f"{len(pdfs)} PDF reports generated successfully",
+            data={
+                "reports": [
+                    {
+                        "pdf_data": base64.b64encode(pdf_bytes).decode('utf-8'),
+                        "filename": f"FinancePulse_Report_{filename_stamp}_{i + 1}.pdf",
+                        "size_bytes": len(pdf_bytes)
+                    }
+                    for i, pdf_bytes in enumerate(pdfs)
+                ],
+                "generated_at": timestamp,
+                "includes_ai_analysis": include_ai_analysis
+            }
+        )
+        
+    except Exception as e:
+        logger.error(f"Error generating PDF reports: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/system/health", response_model=APIResponse)
 async def system_health():
     """Get system health status"""
@@ -959,6 +1015,18 @@ async def trigger_phone_notification(data: dict):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/voice/tts/{stream_id}/{segment}")
+async def stream_call_audio(stream_id: str, segment: int, text: Optional[str] = None, sig: Optional[str] = None):
+    """Stream synthesized audio for one sentence of a live fraud call (Twilio <Play> target)"""
+    from app.services.intelligent_voice_caller import intelligent_voice_caller
+    
+    audio = await intelligent_voice_caller.stream_tts_segment(stream_id, segment, text, sig)
+    if audio is None:
+        raise HTTPException(status_code=404, detail="Audio segment not found")
+    
+    return StreamingResponse(audio, media_type="audio/mpeg")
+
+
 @router.post("/cards/freeze", response_model=APIResponse)
 async def freeze_card(data: dict):
     """Freeze a customer card (Cedar-OS agent tool endpoint)"""
@@ -111,6 +111,24 @@ class Settings(BaseSettings):
     OPENAI_MODEL: str = Field(
         default="gpt-3.5-turbo", description="OpenAI model to use (gpt-3.5-turbo, gpt-4, gpt-4-turbo)"
     )
+    OPENAI_MODEL_CHEAP: Optional[str] = Field(
+        default="gpt-4o-mini", description="Cheaper model for low and medium risk alert content (unset to always use OPENAI_MODEL)"
+    )
+    OPENAI_MAX_TOKENS_EMAIL: int = Field(
+        default=800, description="Completion token limit for generated alert emails"
+    )
+    OPENAI_MAX_TOKENS_PHONE: int = Field(
+        default=250, description="Completion token limit for generated phone scripts"
+    )
+    OPENAI_CONCURRENCY: int = Field(
+        default=20, description="Maximum concurrent OpenAI requests for batched content generation"
+    )
+    OPENAI_SEMANTIC_CACHE: bool = Field(
+        default=False, description="Reuse alert content for near-duplicate prompts (needs sentence-transformers and faiss)"
+    )
+    OPENAI_REDIS_CACHE: bool = Field(
+        default=False, description="Share cached OpenAI responses across restarts and replicas through REDIS_URL"
+    )
     
     # Google Gemini API Configuration (Legacy - kept for backward compatibility)
     GEMINI_API_KEY: Optional[str] = Field(
@@ -136,6 +154,9 @@ class Settings(BaseSettings):
     TWILIO_WEBHOOK_URL: Optional[str] = Field(
         default=None, description="Base URL for Twilio webhooks"
     )
+    TWILIO_MAX_CONCURRENT_CALLS: int = Field(
+        default=15, description="Maximum Twilio API requests in flight from the phone service"
+    )
     
     # HR Audit Voice Integration
     PUBLIC_BASE_URL: Optional[str] = Field(
@@ -144,6 +165,12 @@ class Settings(BaseSettings):
     ENABLE_VOICE_CALLS: bool = Field(
         default=True, description="Enable integrated voice calling for fraud alerts"
     )
+    MAX_CONCURRENT_CALLS: int = Field(
+        default=4, description="Maximum fraud alert calls placed at the same time"
+    )
+    MAX_CONCURRENT_SCRIPT_GENERATIONS: int = Field(
+        default=8, description="Maximum concurrent LLM requests for call scripts"
+    )
     
     # Notification Thresholds
     EMAIL_RISK_THRESHOLD: str = Field(
@@ -155,6 +182,19 @@ class Settings(BaseSettings):
     NOTIFICATION_COOLDOWN: int = Field(
         default=300, description="Cooldown between notifications for same customer (seconds)"
     )
+    EMAIL_RPM: int = Field(
+        default=60, description="Maximum outbound notification emails per minute"
+    )
+    VOICE_RPM: int = Field(
+        default=20, description="Maximum outbound notification calls per minute"
+    )
+    NOTIFICATION_HISTORY_FILE: Optional[str] = Field(
+        default=None, description="Append-only JSON-lines file for notification history (None for memory only)"
+    )
+    NOTIFICATION_CACHE_MODE: str = Field(
+        default="enabled",
+        description="Duplicate anomaly cache mode: enabled, read_only, replay (no outbound sends) or disabled"
+    )
     
     # Feature Flags
     ENABLE_MOCK_DATA: bool = Field(
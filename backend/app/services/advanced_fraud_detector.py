@@ -414,10 +414,12 @@ class AdvancedFraudDetector:
         
         return ""
 
-    def get_flagged_transactions(self) -> List[Dict]:
-        """Get all pre-flagged transactions from the data"""
+    def get_flagged_transactions(self, customer_name: Optional[str] = None) -> List[Dict]:
+        """Get pre-flagged transactions from the data, optionally for one customer"""
         flagged = []
         for transaction in self.transaction_history:
+            if customer_name is not None and transaction.get("customer_name") != customer_name:
+                continue
             if isinstance(transaction["transaction_detail"], dict):
                 if transaction["transaction_detail"].get("status") == "flagged":
                     flagged.append(transaction)
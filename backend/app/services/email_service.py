@@ -9,6 +9,7 @@ import asyncio
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.utils import formatdate
+from dataclasses import dataclass, field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
@@ -19,6 +20,17 @@ from app.services.openai_service import openai_service
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class EmailPayload:
+    """A single anomaly notification email waiting to be sent"""
+    transaction: Transaction
+    anomaly_result: AnomalyResult
+    recipient_email: str
+    customer_name: str = "Customer"
+    # Other anomalies for the same recipient, delivered in this one email
+    related: List["EmailPayload"] = field(default_factory=list)
+
+
 class EmailService:
     """SMTP email service for sending anomaly notifications"""
     
@@ -86,6 +98,64 @@ class EmailService:
             logger.error(f"Error sending anomaly notification email: {e}")
             return False
     
+    async def send_anomaly_notifications_bulk(self, payloads: List[EmailPayload]) -> List[bool]:
+        """
+        Send several anomaly notification emails over one SMTP session
+        Returns a per-payload success list in the same order as payloads
+        """
+        if not self.is_configured:
+            logger.warning("Email service not configured, cannot send notifications")
+            return [False] * len(payloads)
+        
+        try:
+            # Generate all email contents concurrently (with fallback)
+            contents = await openai_service.generate_emails_batch([
+                (payload.transaction, payload.anomaly_result, payload.customer_name)
+                for payload in payloads
+            ])
+            contents = [
+                self._summarise_related(payload, subject, body)
+                for payload, (subject, body) in zip(payloads, contents)
+            ]
+            
+            messages = [
+                (self._build_message(payload.recipient_email, subject, body), payload.recipient_email)
+                for payload, (subject, body) in zip(payloads, contents)
+            ]
+            
+            # One connection, TLS handshake and login for the whole batch
+            results = await asyncio.get_event_loop().run_in_executor(
+                None, self._smtp_send_many, messages
+            )
+            
+            for payload, (subject, _), success in zip(payloads, contents, results):
+                if success:
+                    logger.info(f"📧 ✅ ALERT EMAIL SENT to {payload.recipient_email} | Customer: {payload.customer_name} | Subject: {subject[:50]}...")
+                    logger.info(f"FRONTEND_NOTIFICATION: Email sent to {payload.customer_name} ({payload.recipient_email})")
+                else:
+                    logger.error(f"❌ Failed to send anomaly notification email to {payload.recipient_email}")
+            
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error sending bulk anomaly notification emails: {e}")
+            return [False] * len(payloads)
+    
+    @staticmethod
+    def _summarise_related(payload: EmailPayload, subject: str, body: str) -> tuple:
+        """Extend a payload's subject and body with a summary of its grouped anomalies"""
+        if not payload.related:
+            return subject, body
+        
+        subject = f"{len(payload.related) + 1} anomalies detected - {subject}"
+        lines = [
+            f"- {other.customer_name}: ${other.transaction.amount:,.2f} at {other.transaction.merchant_name} "
+            f"({other.anomaly_result.risk_level.value} risk)"
+            for other in payload.related
+        ]
+        body = f"{body}\n\nAdditional flagged transactions:\n" + "\n".join(lines)
+        return subject, body
+    
     async def send_custom_email(
         self,
         to_email: str,
@@ -112,15 +182,7 @@ class EmailService:
         """Internal method to send email via SMTP"""
         try:
             # Create message
-            msg = MIMEMultipart()
-            msg['From'] = f"{settings.EMAIL_FROM_NAME} <{settings.EMAIL_FROM}>"
-            msg['To'] = to_email
-            msg['Subject'] = subject
-            msg['Date'] = formatdate(localtime=True)
-            
-            # Add body
-            mime_type = 'html' if is_html else 'plain'
-            msg.attach(MIMEText(body, mime_type))
+            msg = self._build_message(to_email, subject, body, is_html)
             
             # Add attachments if provided
             if attachments:
@@ -139,12 +201,23 @@ class EmailService:
             logger.error(f"Error in _send_email: {e}")
             return False
     
-    def _smtp_send(self, msg: MIMEMultipart, to_email: str):
-        """Synchronous SMTP send operation"""
-        smtp = None
+    def _build_message(self, to_email: str, subject: str, body: str, is_html: bool = False) -> MIMEMultipart:
+        """Build a MIME message with the standard sender headers"""
+        msg = MIMEMultipart()
+        msg['From'] = f"{settings.EMAIL_FROM_NAME} <{settings.EMAIL_FROM}>"
+        msg['To'] = to_email
+        msg['Subject'] = subject
+        msg['Date'] = formatdate(localtime=True)
+        
+        # Add body
+        mime_type = 'html' if is_html else 'plain'
+        msg.attach(MIMEText(body, mime_type))
+        return msg
+    
+    def _smtp_connect(self) -> smtplib.SMTP:
+        """Open an authenticated SMTP connection"""
+        smtp = smtplib.SMTP(settings.SMTP_SERVER, settings.SMTP_PORT)
         try:
-            # Create SMTP connection
-            smtp = smtplib.SMTP(settings.SMTP_SERVER, settings.SMTP_PORT)
             smtp.ehlo()
             
             # Start TLS encryption
@@ -154,6 +227,16 @@ class EmailService:
             
             # Login
             smtp.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
+            return smtp
+        except Exception:
+            smtp.close()
+            raise
+    
+    def _smtp_send(self, msg: MIMEMultipart, to_email: str):
+        """Synchronous SMTP send operation"""
+        smtp = None
+        try:
+            smtp = self._smtp_connect()
             
             # Send email
             smtp.send_message(msg, settings.EMAIL_FROM, [to_email])
@@ -162,6 +245,26 @@ class EmailService:
             if smtp:
                 smtp.quit()
     
+    def _smtp_send_many(self, messages: List[tuple]) -> List[bool]:
+        """Synchronous SMTP send of (message, recipient) pairs over a single connection"""
+        results = []
+        smtp = self._smtp_connect()
+        try:
+            for msg, to_email in messages:
+                try:
+                    smtp.send_message(msg, settings.EMAIL_FROM, [to_email])
+                    results.append(True)
+                except smtplib.SMTPException as e:
+                    logger.error(f"SMTP send to {to_email} failed: {e}")
+                    results.append(False)
+        finally:
+            # A server that dropped the connection mid-batch can't QUIT; keep the per-message results
+            try:
+                smtp.quit()
+            except smtplib.SMTPException:
+                smtp.close()
+        return results
+    
     async def _test_smtp_connection(self):
         """Test SMTP connection and authentication"""
         def test_connection():
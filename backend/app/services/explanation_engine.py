@@ -4,7 +4,7 @@ Generates human-readable explanations for anomaly detection results
 """
 
 import logging
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 from datetime import datetime
 
 from app.models import Transaction, AnomalyResult, AnomalyType, RiskLevel
@@ -13,9 +13,73 @@ from app.models import Transaction, AnomalyResult, AnomalyType, RiskLevel
 logger = logging.getLogger(__name__)
 
 
+def _explain_unusual_amount(template: str, transaction: Transaction, anomaly_result: AnomalyResult) -> str:
+    avg_amount = anomaly_result.features.get("amount_vs_avg", 1) * transaction.amount
+    multiplier = transaction.amount / max(avg_amount, 1)
+    return template.format(
+        amount=transaction.amount,
+        avg_amount=avg_amount,
+        multiplier=f"{multiplier:.1f}"
+    )
+
+
+def _explain_unusual_time(template: str, transaction: Transaction, anomaly_result: AnomalyResult) -> str:
+    time_str = transaction.timestamp.strftime("%I:%M %p")
+    typical_hours = "9 AM - 6 PM"  # Could be personalized
+    return template.format(
+        time=time_str,
+        typical_hours=typical_hours
+    )
+
+
+def _explain_unusual_frequency(template: str, transaction: Transaction, anomaly_result: AnomalyResult) -> str:
+    count = 5  # Would be calculated from actual data
+    multiplier = 3  # Would be calculated from baseline
+    return template.format(
+        count=count,
+        multiplier=multiplier
+    )
+
+
+def _explain_unusual_location(template: str, transaction: Transaction, anomaly_result: AnomalyResult) -> str:
+    location = f"{transaction.location.get('city', 'Unknown')}, {transaction.location.get('state', '')}"
+    distance = 150  # Would be calculated from actual data
+    return template.format(
+        location=location,
+        distance=distance
+    )
+
+
+def _explain_unusual_merchant(template: str, transaction: Transaction, anomaly_result: AnomalyResult) -> str:
+    return template.format(merchant=transaction.merchant_name)
+
+
+def _explain_velocity_spike(template: str, transaction: Transaction, anomaly_result: AnomalyResult) -> str:
+    timeframe = 15  # Would be calculated from actual data
+    return template.format(timeframe=timeframe)
+
+
+def _explain_static(template: str, transaction: Transaction, anomaly_result: AnomalyResult) -> str:
+    return template
+
+
 class ExplanationEngine:
     """Generates human-readable explanations for detected anomalies"""
     
+    __slots__ = ("explanation_templates",)
+    
+    # Fills in template variables for each anomaly type
+    _TYPE_HANDLERS: Dict[AnomalyType, Callable[[str, Transaction, AnomalyResult], str]] = {
+        AnomalyType.UNUSUAL_AMOUNT: _explain_unusual_amount,
+        AnomalyType.UNUSUAL_TIME: _explain_unusual_time,
+        AnomalyType.UNUSUAL_FREQUENCY: _explain_unusual_frequency,
+        AnomalyType.UNUSUAL_LOCATION: _explain_unusual_location,
+        AnomalyType.UNUSUAL_MERCHANT: _explain_unusual_merchant,
+        AnomalyType.VELOCITY_SPIKE: _explain_velocity_spike,
+        AnomalyType.AMOUNT_PATTERN: _explain_static,
+        AnomalyType.GEOGRAPHIC_OUTLIER: _explain_static,
+    }
+    
     def __init__(self):
         self.explanation_templates = self._load_explanation_templates()
     
@@ -25,22 +89,30 @@ class ExplanationEngine:
             if not anomaly_result.is_anomaly:
                 return "Transaction appears normal based on customer patterns."
             
-            # Build explanation based on anomaly types
-            explanations = []
+            # Build explanation based on anomaly types; only allocate a list
+            # once a second explanation shows up
+            first: Optional[str] = None
+            explanations: Optional[List[str]] = None
             
             for anomaly_type in anomaly_result.anomaly_types:
                 explanation = self._get_type_explanation(anomaly_type, transaction, anomaly_result)
-                if explanation:
+                if not explanation:
+                    continue
+                if first is None:
+                    first = explanation
+                elif explanations is None:
+                    explanations = [first, explanation]
+                else:
                     explanations.append(explanation)
             
-            # If no specific explanations, use generic one
-            if not explanations:
-                explanations.append(self._get_generic_explanation(transaction, anomaly_result))
+            if explanations is not None:
+                return self._combine_explanations(explanations, anomaly_result.confidence_score)
             
-            # Combine explanations
-            combined_explanation = self._combine_explanations(explanations, anomaly_result.confidence_score)
+            # If no specific explanations, use generic one
+            if first is None:
+                first = self._get_generic_explanation(transaction, anomaly_result)
             
-            return combined_explanation
+            return self._finalize_single(first, anomaly_result.confidence_score)
             
         except Exception as e:
             logger.error(f"Error generating explanation: {e}")
@@ -90,57 +162,10 @@ class ExplanationEngine:
             return None
         
         try:
-            template = template_info["template"]
-            
-            # Fill in template variables based on anomaly type
-            if anomaly_type == AnomalyType.UNUSUAL_AMOUNT:
-                avg_amount = anomaly_result.features.get("amount_vs_avg", 1) * transaction.amount
-                multiplier = transaction.amount / max(avg_amount, 1)
-                return template.format(
-                    amount=transaction.amount,
-                    avg_amount=avg_amount,
-                    multiplier=f"{multiplier:.1f}"
-                )
-            
-            elif anomaly_type == AnomalyType.UNUSUAL_TIME:
-                time_str = transaction.timestamp.strftime("%I:%M %p")
-                typical_hours = "9 AM - 6 PM"  # Could be personalized
-                return template.format(
-                    time=time_str,
-                    typical_hours=typical_hours
-                )
-            
-            elif anomaly_type == AnomalyType.UNUSUAL_FREQUENCY:
-                count = 5  # Would be calculated from actual data
-                multiplier = 3  # Would be calculated from baseline
-                return template.format(
-                    count=count,
-                    multiplier=multiplier
-                )
-            
-            elif anomaly_type == AnomalyType.UNUSUAL_LOCATION:
-                location = f"{transaction.location.get('city', 'Unknown')}, {transaction.location.get('state', '')}"
-                distance = 150  # Would be calculated from actual data
-                return template.format(
-                    location=location,
-                    distance=distance
-                )
-            
-            elif anomaly_type == AnomalyType.UNUSUAL_MERCHANT:
-                return template.format(merchant=transaction.merchant_name)
-            
-            elif anomaly_type == AnomalyType.VELOCITY_SPIKE:
-                timeframe = 15  # Would be calculated from actual data
-                return template.format(timeframe=timeframe)
-            
-            elif anomaly_type == AnomalyType.AMOUNT_PATTERN:
-                return template
-            
-            elif anomaly_type == AnomalyType.GEOGRAPHIC_OUTLIER:
-                return template
-            
-            else:
-                return f"Unusual {anomaly_type.value.replace('_', ' ')} detected"
+            handler = self._TYPE_HANDLERS.get(anomaly_type)
+            if handler:
+                return handler(template_info["template"], transaction, anomaly_result)
+            return f"Unusual {anomaly_type.value.replace('_', ' ')} detected"
                 
         except Exception as e:
             logger.error(f"Error formatting explanation template: {e}")
@@ -164,12 +189,15 @@ class ExplanationEngine:
         if len(explanations) == 1:
             explanation = explanations[0]
         elif len(explanations) == 2:
-            explanation = f"{explanations[0]} and {explanations[1].lower()}"
+            explanation = "".join((explanations[0], " and ", explanations[1].lower()))
         else:
             # Multiple explanations - summarize
             explanation = f"Multiple suspicious patterns detected: {explanations[0]} (plus {len(explanations) - 1} other factors)"
         
-        # Add confidence qualifier
+        return self._finalize_single(explanation, confidence_score)
+    
+    def _finalize_single(self, explanation: str, confidence_score: float) -> str:
+        """Append the confidence qualifier to a single explanation"""
         confidence_pct = int(confidence_score * 100)
         if confidence_pct >= 90:
             qualifier = "Very high confidence"
@@ -9,8 +9,10 @@ import os
 import logging
 import json
 import asyncio
+import random
+from dataclasses import dataclass, asdict
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from enum import Enum
 
 # Core dependencies
@@ -32,6 +34,24 @@ from app.services.openai_service import openai_service
 
 logger = logging.getLogger(__name__)
 
+_MONTHS = (
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December"
+)
+
+
+def _format_call_time(ts: datetime) -> str:
+    """Format a timestamp like strftime("%B %d at %I:%M %p") without the locale layer"""
+    hour12 = ts.hour % 12 or 12
+    ampm = "AM" if ts.hour < 12 else "PM"
+    return f"{_MONTHS[ts.month - 1]} {ts.day:02d} at {hour12:02d}:{ts.minute:02d} {ampm}"
+
+
+_VERIFY_TEMPLATE = """Hello {name}, this is FinancePulse Security. 
+{message}
+Please check your FinancePulse app or call us back if you have any questions. 
+Your account security is our top priority. Thank you."""
+
 
 class CallType(Enum):
     FRAUD_ALERT = "fraud_alert"
@@ -50,16 +70,58 @@ class CallStatus(Enum):
     NO_ANSWER = "no-answer"
 
 
+@dataclass(slots=True)
+class _CallRecord:
+    """Tracked state for an in-flight Twilio call"""
+    call_sid: str
+    phone_number: str
+    customer_name: str
+    call_type: str
+    transaction_id: Optional[str]
+    script: str
+    status: str
+    created_at: str
+
+
+@dataclass(slots=True)
+class FraudCallRequest:
+    """A fraud alert call waiting to be placed"""
+    phone_number: str
+    customer_name: str
+    transaction: Transaction
+    anomaly_result: AnomalyResult
+
+
 class FinancePulseVoiceService:
     """Integrated voice service for FinancePulse fraud detection calls"""
     
+    __slots__ = (
+        "twilio_client",
+        "is_configured",
+        "active_calls",
+        "conversation_history",
+        "twilio_account_sid",
+        "twilio_auth_token",
+        "twilio_phone_number",
+        "webhook_base_url",
+        "demo_mode",
+        "_rng",
+        "_call_sem",
+    )
+    
     def __init__(self):
         # Twilio configuration from FinancePulse settings
         self.twilio_client = None
         self.is_configured = False
-        self.active_calls: Dict[str, Dict[str, Any]] = {}
+        self.active_calls: Dict[str, _CallRecord] = {}
         self.conversation_history: Dict[str, list] = {}
         
+        # Private RNG for demo call simulation
+        self._rng = random.Random()
+        
+        # Caps concurrent placements when calls are dispatched in bulk
+        self._call_sem = asyncio.Semaphore(settings.MAX_CONCURRENT_CALLS)
+        
         # Use settings from hackgtcedar if needed or FinancePulse settings
         self.twilio_account_sid = getattr(settings, 'TWILIO_ACCOUNT_SID', None)
         self.twilio_auth_token = getattr(settings, 'TWILIO_AUTH_TOKEN', None) 
@@ -155,6 +217,23 @@ class FinancePulseVoiceService:
                 'message': f'Failed to make fraud alert call: {e}'
             }
     
+    async def make_fraud_alert_calls_bulk(self, calls: List[FraudCallRequest]) -> List[Dict[str, Any]]:
+        """
+        Place a batch of fraud alert calls
+        Returns one call result per request, in the same order
+        """
+        async def place(call: FraudCallRequest) -> Dict[str, Any]:
+            async with self._call_sem:
+                return await self.make_fraud_alert_call(
+                    phone_number=call.phone_number,
+                    customer_name=call.customer_name,
+                    transaction=call.transaction,
+                    anomaly_result=call.anomaly_result
+                )
+        
+        # Twilio has no bulk call endpoint, so calls are placed concurrently
+        return await asyncio.gather(*(place(call) for call in calls))
+    
     async def make_verification_call(
         self,
         phone_number: str,
@@ -164,7 +243,7 @@ class FinancePulseVoiceService:
         """Make a verification call for account security"""
         
         try:
-            script = await self._generate_verification_script(customer_name, verification_message)
+            script = self._generate_verification_script(customer_name, verification_message)
             
             return await self._make_call(
                 phone_number=phone_number,
@@ -208,16 +287,15 @@ class FinancePulseVoiceService:
     ) -> Dict[str, Any]:
         """Simulate a call with detailed logging"""
         
-        import random
-        
-        call_id = f"demo_call_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{random.randint(1000, 9999)}"
+        rng = self._rng
+        call_id = f"demo_call_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{rng.randint(1000, 9999)}"
         
         # Simulate call success/failure
         success_rate = 0.85  # 85% success rate in demo
-        success = random.random() < success_rate
+        success = rng.random() < success_rate
         
         # Simulate call duration
-        call_duration = random.randint(30, 120) if success else 0
+        call_duration = rng.randint(30, 120) if success else 0
         
         logger.info("🎭" + "="*60)
         logger.info(f"📞 SIMULATED FRAUD ALERT CALL - Call ID: {call_id}")
@@ -274,16 +352,16 @@ class FinancePulseVoiceService:
             call_sid = call.sid
             
             # Store call info
-            self.active_calls[call_sid] = {
-                'call_sid': call_sid,
-                'phone_number': phone_number,
-                'customer_name': customer_name,
-                'call_type': call_type.value,
-                'transaction_id': transaction_id,
-                'script': script,
-                'status': 'initiated',
-                'created_at': datetime.utcnow().isoformat()
-            }
+            self.active_calls[call_sid] = _CallRecord(
+                call_sid=call_sid,
+                phone_number=phone_number,
+                customer_name=customer_name,
+                call_type=call_type.value,
+                transaction_id=transaction_id,
+                script=script,
+                status='initiated',
+                created_at=datetime.utcnow().isoformat()
+            )
             
             logger.info(f"📞 REAL TWILIO CALL initiated to {self._mask_phone_number(phone_number)}")
             logger.info(f"📱 Call SID: {call.sid}")
@@ -320,7 +398,7 @@ class FinancePulseVoiceService:
             risk_level = anomaly_result.risk_level.value.upper()
             amount = f"${transaction.amount:.2f}"
             merchant = transaction.merchant_name
-            timestamp = transaction.timestamp.strftime("%B %d at %I:%M %p")
+            timestamp = _format_call_time(transaction.timestamp)
             
             prompt = f"""
 Generate a professional, calm fraud alert phone call script for a customer.
@@ -349,11 +427,24 @@ else "Notification for your awareness"}
 Generate ONLY the spoken script, no stage directions.
 """
             
-            # Use OpenAI to generate script (includes fallback)
-            script = await openai_service.generate_custom_content(prompt, max_tokens=200)
+            # Stream the script from OpenAI (includes fallback) and stop reading
+            # as soon as it runs past ~45 seconds of speech
+            parts = []
+            length = 0
+            truncated = False
+            stream = openai_service.stream_custom_content(prompt, max_tokens=200)
+            try:
+                async for chunk in stream:
+                    parts.append(chunk)
+                    length += len(chunk)
+                    if length > 600:
+                        truncated = True
+                        break
+            finally:
+                await stream.aclose()
             
-            # Ensure script isn't too long
-            if len(script) > 600:  # ~45 seconds of speech
+            script = "".join(parts)
+            if truncated:
                 script = script[:550] + "... Please call us back at your earliest convenience. Thank you."
             
             return script.strip()
@@ -374,17 +465,10 @@ Your account is secure and we've flagged this transaction for your protection.
 Please call us back {urgency} at 1-800-FINANCE or check your FinancePulse app to verify this transaction. 
 Thank you for choosing FinancePulse where your security is our priority."""
     
-    async def _generate_verification_script(
-        self,
-        customer_name: str,
-        message: str
-    ) -> str:
+    @staticmethod
+    def _generate_verification_script(customer_name: str, message: str) -> str:
         """Generate verification call script"""
-        
-        return f"""Hello {customer_name}, this is FinancePulse Security. 
-{message}
-Please check your FinancePulse app or call us back if you have any questions. 
-Your account security is our top priority. Thank you."""
+        return _VERIFY_TEMPLATE.format(name=customer_name, message=message)
     
     async def _log_call_record(self, **call_details):
         """Log call record for tracking and analytics"""
@@ -405,11 +489,12 @@ Your account security is our top priority. Thank you."""
     
     def get_call_status(self, call_sid: str) -> Optional[Dict[str, Any]]:
         """Get call status by SID"""
-        return self.active_calls.get(call_sid)
+        record = self.active_calls.get(call_sid)
+        return asdict(record) if record else None
     
     def get_active_calls(self) -> Dict[str, Dict[str, Any]]:
         """Get all active calls"""
-        return self.active_calls
+        return {call_sid: asdict(record) for call_sid, record in self.active_calls.items()}
     
     def get_call_stats(self) -> Dict[str, Any]:
         """Get call statistics"""
@@ -5,16 +5,24 @@ Uses hybrid LLM models and real customer data for personalized fraud alerts
 """
 
 import os
-import json
 import logging
 import asyncio
-import random
+import secrets
+import time
+import itertools
+import hashlib
+import hmac
+import re
+import urllib.parse
+from collections import OrderedDict, deque
+from functools import lru_cache
+from string import Template
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import AsyncIterator, Deque, Dict, List, Any, Optional, Tuple
 
-# Twilio integration
-from twilio.rest import Client
-from twilio.twiml.voice_response import VoiceResponse
+import numpy as np
+import orjson
+from cachetools import TTLCache
 
 # FinancePulse services
 from app.core.config import settings
@@ -23,9 +31,90 @@ from app.services.openai_service import openai_service
 
 logger = logging.getLogger(__name__)
 
+# Invariant script instructions. Kept ahead of the per-customer details so every
+# request shares the same prompt prefix and hits the provider's prompt cache.
+_FRAUD_SCRIPT_INSTRUCTIONS = """Generate a professional fraud alert phone call script for a bank customer.
+
+SCRIPT REQUIREMENTS:
+- Identify as "FinancePulse Fraud Prevention Team"
+- Professional, calm, and reassuring tone
+- Explain WHY the transaction was flagged (without revealing sensitive algorithms)
+- Clear next steps for the customer
+- Under 45 seconds when spoken (≈150 words)
+- No technical jargon
+{age_consideration}
+Generate ONLY the spoken script, no stage directions or formatting."""
+
+_AGE_YOUNG = "- Use modern, direct language. Customer is likely tech-savvy.\n"
+_AGE_DEFAULT = ""
+_AGE_SENIOR = "- Use clear, respectful language appropriate for a senior customer. Explain technical terms simply.\n"
+
+# One pre-rendered prefix per age bucket, indexed by (age >= 31) + (age >= 65)
+_STATIC_PROMPT_PREFIXES = tuple(
+    _FRAUD_SCRIPT_INSTRUCTIONS.format(age_consideration=guidance)
+    for guidance in (_AGE_YOUNG, _AGE_DEFAULT, _AGE_SENIOR)
+)
+
+# Only these tiers justify an LLM round-trip; lower risks use the template script
+_LLM_SCRIPT_RISK_LEVELS = frozenset({FraudRiskLevel.CRITICAL, FraudRiskLevel.HIGH})
+
+# Markdown emphasis stripped from generated scripts
+_STAR_RE = re.compile(r"\*+")
+
+# Fallback script wording per call urgency
+_URGENCY_MAP = {
+    "IMMEDIATE": "requires your immediate attention",
+    "URGENT": "needs your prompt response",
+    "STANDARD": "should be verified"
+}
+
+# Sentence boundaries used to split live-call scripts into separately synthesized clips
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+')
+
+_FALLBACK_SCRIPT_TEMPLATE = Template(
+    "Hello $name, this is the FinancePulse Fraud Prevention Team. "
+    "We detected a $$$amount transaction at $merchant that $urgency_text. "
+    "This was flagged because $reason. "
+    "Your account is secure, but we need you to verify this transaction. "
+    "Please call us at 1-800-FRAUD-HELP or check your FinancePulse app immediately. "
+    "Thank you for helping us protect your account."
+)
+
+
+@lru_cache(maxsize=256)
+def _compile_say_twiml(script: str) -> str:
+    """Build escaped <Say> TwiML for a script; cached so retried calls skip the XML build"""
+    from twilio.twiml.voice_response import VoiceResponse
+    
+    response = VoiceResponse()
+    response.say(script, voice="alice", rate="medium")
+    return str(response)
+
+
 class IntelligentVoiceCaller:
     """Advanced voice calling system with AI-generated personalized scripts"""
     
+    # Maximum number of generated scripts kept in memory
+    _SCRIPT_CACHE_MAX = 512
+    
+    # Rolling window of call logs kept for statistics
+    _HISTORY_MAX = 10_000
+    
+    # Live-call scripts whose sentence audio can still be requested by Twilio, and for how long
+    _TTS_STREAMS_MAX = 256
+    _TTS_STREAM_TTL = 600
+    
+    # Simulated call success rate per risk level
+    _SUCCESS_RATES = {
+        FraudRiskLevel.CRITICAL: 0.95,
+        FraudRiskLevel.HIGH: 0.90,
+        FraudRiskLevel.MEDIUM: 0.85,
+        FraudRiskLevel.LOW: 0.80
+    }
+    
+    # Number of (draw, duration) pairs pre-generated per refill
+    _RAND_POOL_SIZE = 1024
+    
     def __init__(self):
         # Twilio configuration
         self.twilio_client = None
@@ -35,7 +124,29 @@ class IntelligentVoiceCaller:
         # Voice calling statistics
         self.calls_made = 0
         self.successful_calls = 0
-        self.call_history: List[Dict] = []
+        self.call_history: Deque[Dict] = deque(maxlen=self._HISTORY_MAX)
+        
+        # LLM scripts keyed on a fingerprint of the prompt context
+        self._script_cache: "OrderedDict[str, str]" = OrderedDict()
+        
+        # In-flight LLM generations, shared by concurrent requests for the same context
+        self._inflight_scripts: Dict[str, asyncio.Task] = {}
+        
+        # Pre-drawn randoms for demo call simulation
+        self._rng = np.random.default_rng()
+        self._rand_pool = iter(())
+        self._call_counter = itertools.count()
+        
+        # Sentence clips for live calls, served to Twilio <Play> one by one
+        self._tts_segments: TTLCache = TTLCache(maxsize=self._TTS_STREAMS_MAX, ttl=self._TTS_STREAM_TTL)
+        self._tts_prefetch: Dict[Tuple[str, int], asyncio.Task] = {}
+        
+        # Call-log tasks still running in the background
+        self._pending_logs: set = set()
+        
+        # Keep concurrent calls and LLM requests under Twilio/OpenAI limits
+        self._call_sem = asyncio.Semaphore(settings.MAX_CONCURRENT_CALLS)
+        self._llm_sem = asyncio.Semaphore(settings.MAX_CONCURRENT_SCRIPT_GENERATIONS)
         
         # Initialize Twilio if configured
         self._initialize_twilio()
@@ -43,22 +154,33 @@ class IntelligentVoiceCaller:
     def _initialize_twilio(self):
         """Initialize Twilio client if credentials are available"""
         try:
-            twilio_sid = getattr(settings, 'TWILIO_ACCOUNT_SID', None)
-            twilio_token = getattr(settings, 'TWILIO_AUTH_TOKEN', None)
-            twilio_phone = getattr(settings, 'TWILIO_PHONE_NUMBER', None)
+            twilio_sid = settings.TWILIO_ACCOUNT_SID
+            twilio_token = settings.TWILIO_AUTH_TOKEN
+            twilio_phone = settings.TWILIO_PHONE_NUMBER
             
-            if all([twilio_sid, twilio_token, twilio_phone]):
-                self.twilio_client = Client(twilio_sid, twilio_token)
-                self.twilio_phone_number = twilio_phone
-                self.demo_mode = False
-                logger.info("✅ Twilio initialized for live calls")
-            else:
+            if not (twilio_sid and twilio_token and twilio_phone):
                 logger.info("🎭 Twilio credentials not found - running in demo mode")
+                return
+            
+            # Imported lazily so demo deployments never load the Twilio REST tree
+            from twilio.rest import Client
+            
+            self.twilio_client = Client(twilio_sid, twilio_token)
+            self.twilio_phone_number = twilio_phone
+            self.demo_mode = False
+            logger.info("✅ Twilio initialized for live calls")
         except Exception as e:
             logger.error(f"Twilio initialization failed: {e} - using demo mode")
     
     async def generate_personalized_fraud_script(self, analysis: TransactionAnalysis) -> str:
-        """Generate personalized fraud alert script using hybrid LLM approach"""
+        """
+        Generate personalized fraud alert script using hybrid LLM approach
+        Only CRITICAL and HIGH risk calls go to the LLM; MEDIUM and LOW risk
+        calls are rendered from the fallback template directly
+        """
+        
+        if analysis.risk_level not in _LLM_SCRIPT_RISK_LEVELS:
+            return self._generate_fallback_script(analysis)
         
         customer = analysis.customer
         
@@ -81,16 +203,49 @@ class IntelligentVoiceCaller:
             } for flag in analysis.fraud_flags]
         }
         
+        # Reuse a previously generated script for an identical context
+        cache_key = self._script_cache_key(context)
+        cached_script = self._script_cache.get(cache_key)
+        if cached_script is not None:
+            self._script_cache.move_to_end(cache_key)
+            return cached_script
+        
+        # Join an identical generation that is already running instead of repeating it
+        task = self._inflight_scripts.get(cache_key)
+        if task is None:
+            task = asyncio.create_task(self._generate_llm_script(context, analysis, cache_key))
+            self._inflight_scripts[cache_key] = task
+            task.add_done_callback(lambda _: self._inflight_scripts.pop(cache_key, None))
+        
+        return await asyncio.shield(task)
+    
+    async def _generate_llm_script(self, context: Dict, analysis: TransactionAnalysis, cache_key: str) -> str:
+        """Run the LLM script generation for a context and cache the result"""
+        
         # Create specialized prompt for different risk levels
         prompt = self._create_fraud_script_prompt(context)
+        age = context["customer_age"]
+        instructions = _STATIC_PROMPT_PREFIXES[(age >= 31) + (age >= 65)]
         
         try:
             # Use OpenAI/hybrid model to generate script
-            script = await openai_service.generate_custom_content(prompt)
+            async with self._llm_sem:
+                script = await openai_service.generate_custom_content(
+                    prompt, instructions=instructions, fallback=False
+                )
+            
+            # Unavailable or failed generation: use the template script and leave the cache alone
+            if script is None:
+                return self._generate_fallback_script(analysis)
             
             # Post-process script
             script = self._post_process_script(script, analysis)
             
+            # Only real LLM output reaches the cache
+            self._script_cache[cache_key] = script
+            if len(self._script_cache) > self._SCRIPT_CACHE_MAX:
+                self._script_cache.popitem(last=False)
+            
             return script
             
         except Exception as e:
@@ -98,8 +253,32 @@ class IntelligentVoiceCaller:
             # Fallback to template-based script
             return self._generate_fallback_script(analysis)
     
+    def _script_cache_key(self, context: Dict) -> str:
+        """Build a stable fingerprint of the fields that shape the generated script"""
+        fingerprint = {
+            "name": context["customer_name"],
+            "age": context["customer_age"],
+            "usual_location": context["usual_location"],
+            "avg_monthly_spending": round(context["avg_monthly_spending"], 2),
+            "amount": round(context["transaction_amount"], 2),
+            "merchant": context["merchant"],
+            "location": context["location"],
+            "risk": context["risk_level"],
+            "urgency": context["urgency"],
+            "flags": sorted(
+                (flag["category"], flag["severity"], flag["description"])
+                for flag in context["fraud_flags"]
+            )
+        }
+        return hashlib.blake2b(
+            orjson.dumps(fingerprint, option=orjson.OPT_SORT_KEYS), digest_size=16
+        ).hexdigest()
+    
     def _create_fraud_script_prompt(self, context: Dict) -> str:
-        """Create specialized prompt for fraud alert script generation"""
+        """
+        Create the per-customer part of the fraud alert prompt
+        The invariant instructions live in _STATIC_PROMPT_PREFIXES
+        """
         
         urgency_tone = {
             "IMMEDIATE": "urgent and requires immediate action",
@@ -107,19 +286,10 @@ class IntelligentVoiceCaller:
             "STANDARD": "concerning and should be verified"
         }.get(context["urgency"], "noteworthy")
         
-        # Determine age-appropriate language
-        age_consideration = ""
-        if context["customer_age"] >= 65:
-            age_consideration = "Use clear, respectful language appropriate for a senior customer. Explain technical terms simply."
-        elif context["customer_age"] <= 30:
-            age_consideration = "Use modern, direct language. Customer is likely tech-savvy."
-        
         # Extract primary fraud concerns
         main_concerns = [flag["description"] for flag in context["fraud_flags"][:2]]  # Top 2 concerns
         
         prompt = f"""
-Generate a professional fraud alert phone call script for a bank customer.
-
 CUSTOMER DETAILS:
 - Name: {context["customer_name"]}
 - Age: {context["customer_age"]}
@@ -136,18 +306,7 @@ SUSPICIOUS TRANSACTION:
 MAIN FRAUD INDICATORS:
 {chr(10).join(f"- {concern}" for concern in main_concerns)}
 
-SCRIPT REQUIREMENTS:
-- Identify as "FinancePulse Fraud Prevention Team"
-- Professional, calm, and reassuring tone
-- Explain WHY the transaction was flagged (without revealing sensitive algorithms)
-- Clear next steps for the customer
-- Under 45 seconds when spoken (≈150 words)
-- No technical jargon
-{age_consideration}
-
 IMPORTANT: This is a {context["risk_level"]} risk situation requiring {context["urgency"].lower()} response.
-
-Generate ONLY the spoken script, no stage directions or formatting:
 """
         
         return prompt
@@ -156,9 +315,7 @@ Generate ONLY the spoken script, no stage directions or formatting:
         """Post-process generated script for quality and compliance"""
         
         # Remove any unwanted formatting
-        script = script.strip()
-        script = script.replace("**", "")
-        script = script.replace("*", "")
+        script = _STAR_RE.sub("", script.strip())
         
         # Ensure script isn't too long (45 seconds ≈ 150 words)
         words = script.split()
@@ -176,16 +333,10 @@ Generate ONLY the spoken script, no stage directions or formatting:
         return script
     
     def _generate_fallback_script(self, analysis: TransactionAnalysis) -> str:
-        """Generate fallback script when LLM fails"""
+        """Generate template script for lower-risk calls or when LLM fails"""
         
         customer = analysis.customer
-        urgency_map = {
-            "IMMEDIATE": "requires your immediate attention",
-            "URGENT": "needs your prompt response",
-            "STANDARD": "should be verified"
-        }
-        
-        urgency_text = urgency_map.get(analysis.call_urgency, "requires verification")
+        urgency_text = _URGENCY_MAP.get(analysis.call_urgency, "requires verification")
         
         # Create explanation based on top fraud flags
         if analysis.fraud_flags:
@@ -193,40 +344,97 @@ Generate ONLY the spoken script, no stage directions or formatting:
         else:
             primary_reason = "unusual transaction pattern detected"
         
-        script = f"""Hello {customer.name}, this is the FinancePulse Fraud Prevention Team. We detected a ${analysis.transaction_amount:.2f} transaction at {analysis.merchant_name} that {urgency_text}. This was flagged because {primary_reason.lower()}. Your account is secure, but we need you to verify this transaction. Please call us at 1-800-FRAUD-HELP or check your FinancePulse app immediately. Thank you for helping us protect your account."""
+        script = _FALLBACK_SCRIPT_TEMPLATE.substitute(
+            name=customer.name,
+            amount=f"{analysis.transaction_amount:.2f}",
+            merchant=analysis.merchant_name,
+            urgency_text=urgency_text,
+            reason=primary_reason.lower()
+        )
         
         return script.strip()
     
     async def make_intelligent_fraud_call(self, customer_name: str, phone_number: str = None) -> Dict[str, Any]:
         """Make an intelligent fraud alert call using real customer data"""
         
-        # Get flagged transactions for this customer
+        flagged_transactions = advanced_fraud_detector.get_flagged_transactions(customer_name)
+        analysis, error = self._prepare_fraud_call(customer_name, flagged_transactions)
+        if error:
+            return error
+        
+        # Generate personalized script
+        script = await self.generate_personalized_fraud_script(analysis)
+        
+        return await self._place_fraud_call(analysis, script, phone_number)
+    
+    async def make_intelligent_fraud_calls(
+        self,
+        customer_names: List[str],
+        phone_numbers: Optional[Dict[str, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Make intelligent fraud alert calls for several customers concurrently
+        Scripts are generated in parallel, then all calls are dispatched in parallel.
+        Results are returned in the same order as customer_names.
+        """
+        phone_numbers = phone_numbers or {}
         flagged_transactions = advanced_fraud_detector.get_flagged_transactions()
-        customer_transactions = [t for t in flagged_transactions if t["customer_name"] == customer_name]
+        prepared = [self._prepare_fraud_call(name, flagged_transactions) for name in customer_names]
+        analyses = [analysis for analysis, error in prepared if error is None]
+        
+        scripts = await asyncio.gather(*(
+            self.generate_personalized_fraud_script(analysis) for analysis in analyses
+        ))
+        call_results = await asyncio.gather(*(
+            self._place_fraud_call(analysis, script, phone_numbers.get(analysis.customer.name))
+            for analysis, script in zip(analyses, scripts)
+        ))
+        
+        results = iter(call_results)
+        return [error if error is not None else next(results) for _, error in prepared]
+    
+    def _prepare_fraud_call(
+        self,
+        customer_name: str,
+        flagged_transactions: List[Dict]
+    ) -> Tuple[Optional[TransactionAnalysis], Optional[Dict[str, Any]]]:
+        """Analyze a customer's latest flagged transaction; returns (analysis, error)"""
+        
+        # Find the most recent flagged transaction for this customer
+        latest_transaction = next(
+            (t for t in reversed(flagged_transactions) if t["customer_name"] == customer_name),
+            None
+        )
         
-        if not customer_transactions:
-            return {
+        if latest_transaction is None:
+            return None, {
                 "success": False,
                 "error": f"No flagged transactions found for {customer_name}",
                 "message": "Customer has no suspicious transactions requiring calls"
             }
         
         # Analyze the most recent flagged transaction
-        latest_transaction = customer_transactions[-1]  # Get the last one
         analysis = advanced_fraud_detector.analyze_transaction(
             customer_name, 
             latest_transaction["transaction_detail"]
         )
         
         if not analysis or not analysis.should_call_customer:
-            return {
+            return None, {
                 "success": False,
                 "error": "Transaction does not meet criteria for customer call",
                 "risk_level": analysis.risk_level.value if analysis else "unknown"
             }
         
-        # Generate personalized script
-        script = await self.generate_personalized_fraud_script(analysis)
+        return analysis, None
+    
+    async def _place_fraud_call(
+        self,
+        analysis: TransactionAnalysis,
+        script: str,
+        phone_number: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Dial the customer with a generated script and log the result"""
         
         # Determine phone number (use demo if not provided)
         if not phone_number:
@@ -239,55 +447,38 @@ Generate ONLY the spoken script, no stage directions or formatting:
             analysis=analysis
         )
         
-        # Log call details
-        await self._log_intelligent_call(analysis, script, call_result)
+        # Log call details off the critical path; keep a reference until it finishes
+        log_task = asyncio.create_task(self._log_intelligent_call(analysis, script, call_result))
+        self._pending_logs.add(log_task)
+        log_task.add_done_callback(self._pending_logs.discard)
         
         return call_result
     
     async def _execute_call(self, phone_number: str, script: str, analysis: TransactionAnalysis) -> Dict[str, Any]:
         """Execute the actual call (real or simulated)"""
         
-        if self.demo_mode:
-            return await self._simulate_intelligent_call(phone_number, script, analysis)
-        else:
-            return await self._make_real_intelligent_call(phone_number, script, analysis)
+        masked_phone = self._mask_phone(phone_number)
+        
+        async with self._call_sem:
+            if self.demo_mode:
+                return await self._simulate_intelligent_call(masked_phone, script, analysis)
+            else:
+                return await self._make_real_intelligent_call(phone_number, masked_phone, script, analysis)
     
-    async def _simulate_intelligent_call(self, phone_number: str, script: str, analysis: TransactionAnalysis) -> Dict[str, Any]:
+    async def _simulate_intelligent_call(self, masked_phone: str, script: str, analysis: TransactionAnalysis) -> Dict[str, Any]:
         """Simulate intelligent fraud call with detailed logging"""
         
-        call_id = f"intel_fraud_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{random.randint(1000, 9999)}"
+        call_id = f"intel_fraud_{time.time_ns()}_{next(self._call_counter)}"
         
         # Simulate call success based on risk level
-        success_rates = {
-            FraudRiskLevel.CRITICAL: 0.95,
-            FraudRiskLevel.HIGH: 0.90,
-            FraudRiskLevel.MEDIUM: 0.85,
-            FraudRiskLevel.LOW: 0.80
-        }
-        
-        success = random.random() < success_rates.get(analysis.risk_level, 0.85)
-        duration = random.randint(45, 120) if success else 0
+        draw, duration = self._next_rand()
+        success = draw < self._SUCCESS_RATES.get(analysis.risk_level, 0.85)
+        if not success:
+            duration = 0
         
         # Enhanced logging with fraud analysis details
-        logger.info("🎭" + "="*70)
-        logger.info(f"🔍 INTELLIGENT FRAUD ALERT CALL - ID: {call_id}")
-        logger.info(f"👤 Customer: {analysis.customer.name} (Age: {analysis.customer.age})")
-        logger.info(f"📱 Phone: {self._mask_phone(phone_number)}")
-        logger.info(f"📍 Customer Location: {analysis.customer.usual_location}")
-        logger.info(f"💰 Transaction: ${analysis.transaction_amount:.2f} at {analysis.merchant_name}")
-        logger.info(f"🚨 Risk Level: {analysis.risk_level.value.upper()} ({analysis.overall_risk_score*100:.1f}%)")
-        logger.info(f"⚡ Urgency: {analysis.call_urgency}")
-        logger.info(f"🎯 Fraud Indicators ({len(analysis.fraud_flags)}):")
-        
-        for i, flag in enumerate(analysis.fraud_flags, 1):
-            logger.info(f"   {i}. {flag.category.value.title()}: {flag.description[:60]}...")
-        
-        logger.info(f"✅ Call Status: {'COMPLETED' if success else 'FAILED'}")
-        logger.info(f"⏱️  Duration: {duration} seconds" if success else "⏱️  Duration: No answer/Failed")
-        logger.info(f"📝 Script Length: {len(script)} characters ({len(script.split())} words)")
-        logger.info("🎬 PERSONALIZED FRAUD SCRIPT:")
-        logger.info(f"   \"{script}\"")
-        logger.info("🎭" + "="*70)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("%s", self._render_call_banner(call_id, masked_phone, script, analysis, success, duration))
         
         self.calls_made += 1
         if success:
@@ -299,7 +490,7 @@ Generate ONLY the spoken script, no stage directions or formatting:
             "call_sid": f"demo_intel_{call_id}",
             "status": "completed" if success else "failed",
             "customer_name": analysis.customer.name,
-            "phone_number": self._mask_phone(phone_number),
+            "phone_number": masked_phone,
             "transaction_amount": analysis.transaction_amount,
             "merchant": analysis.merchant_name,
             "risk_level": analysis.risk_level.value,
@@ -314,12 +505,63 @@ Generate ONLY the spoken script, no stage directions or formatting:
             "message": f"Intelligent fraud call {'completed' if success else 'failed'} for {analysis.customer.name}"
         }
     
-    async def _make_real_intelligent_call(self, phone_number: str, script: str, analysis: TransactionAnalysis) -> Dict[str, Any]:
+    def _render_call_banner(
+        self,
+        call_id: str,
+        masked_phone: str,
+        script: str,
+        analysis: TransactionAnalysis,
+        success: bool,
+        duration: int
+    ) -> str:
+        """Render the simulated call log banner as a single multi-line message"""
+        lines = [
+            "🎭" + "="*70,
+            f"🔍 INTELLIGENT FRAUD ALERT CALL - ID: {call_id}",
+            f"👤 Customer: {analysis.customer.name} (Age: {analysis.customer.age})",
+            f"📱 Phone: {masked_phone}",
+            f"📍 Customer Location: {analysis.customer.usual_location}",
+            f"💰 Transaction: ${analysis.transaction_amount:.2f} at {analysis.merchant_name}",
+            f"🚨 Risk Level: {analysis.risk_level.value.upper()} ({analysis.overall_risk_score*100:.1f}%)",
+            f"⚡ Urgency: {analysis.call_urgency}",
+            f"🎯 Fraud Indicators ({len(analysis.fraud_flags)}):"
+        ]
+        
+        for i, flag in enumerate(analysis.fraud_flags, 1):
+            lines.append(f"   {i}. {flag.category.value.title()}: {flag.description[:60]}...")
+        
+        lines.extend((
+            f"✅ Call Status: {'COMPLETED' if success else 'FAILED'}",
+            f"⏱️  Duration: {duration} seconds" if success else "⏱️  Duration: No answer/Failed",
+            f"📝 Script Length: {len(script)} characters ({len(script.split())} words)",
+            "🎬 PERSONALIZED FRAUD SCRIPT:",
+            f"   \"{script}\"",
+            "🎭" + "="*70
+        ))
+        return "\n".join(lines)
+    
+    def _next_rand(self) -> Tuple[float, int]:
+        """Return a (uniform draw, call duration) pair, refilling the pool in bulk"""
+        try:
+            return next(self._rand_pool)
+        except StopIteration:
+            draws = self._rng.random(self._RAND_POOL_SIZE).tolist()
+            durations = self._rng.integers(45, 121, self._RAND_POOL_SIZE).tolist()
+            self._rand_pool = zip(draws, durations)
+            return next(self._rand_pool)
+    
+    async def _make_real_intelligent_call(
+        self,
+        phone_number: str,
+        masked_phone: str,
+        script: str,
+        analysis: TransactionAnalysis
+    ) -> Dict[str, Any]:
         """Make real Twilio call with intelligent script"""
         
         try:
             # Create TwiML with intelligent script
-            twiml = f'<Response><Say voice="alice" rate="medium">{script}</Say></Response>'
+            twiml = self._build_call_twiml(script)
             
             call = self.twilio_client.calls.create(
                 to=phone_number,
@@ -339,7 +581,7 @@ Generate ONLY the spoken script, no stage directions or formatting:
                 "call_sid": call.sid,
                 "status": "initiated",
                 "customer_name": analysis.customer.name,
-                "phone_number": self._mask_phone(phone_number),
+                "phone_number": masked_phone,
                 "risk_level": analysis.risk_level.value,
                 "provider": "twilio_intelligent",
                 "demo_mode": False,
@@ -354,11 +596,115 @@ Generate ONLY the spoken script, no stage directions or formatting:
                 "message": f"Failed to make live call: {e}"
             }
     
+    def _build_call_twiml(self, script: str) -> str:
+        """
+        Build TwiML for a live call
+        With a public URL and OpenAI available, each sentence becomes its own <Play>
+        clip so playback starts after the first sentence is synthesized rather than
+        the whole script; otherwise Twilio's <Say> reads the full script.
+        """
+        if not (settings.PUBLIC_BASE_URL and openai_service.is_initialized):
+            return _compile_say_twiml(script)
+        
+        from twilio.twiml.voice_response import VoiceResponse
+        
+        sentences = [sentence for sentence in _SENTENCE_SPLIT.split(script.strip()) if sentence]
+        stream_id = secrets.token_hex(8)
+        self._tts_segments[stream_id] = sentences
+        
+        # Drop clips still being synthesized for calls whose stream expired or was evicted
+        for key in [key for key in self._tts_prefetch if key[0] not in self._tts_segments]:
+            self._tts_prefetch.pop(key).cancel()
+        
+        # Synthesize the opening sentence while the phone is ringing
+        self._prefetch_tts_segment(stream_id, 0)
+        
+        # Each URL carries its signed sentence, so a worker without this stream can still speak it
+        base_url = settings.PUBLIC_BASE_URL.rstrip("/")
+        response = VoiceResponse()
+        for index, sentence in enumerate(sentences):
+            query = urllib.parse.urlencode({
+                "text": sentence,
+                "sig": self._sign_tts_segment(stream_id, index, sentence)
+            })
+            response.play(f"{base_url}/api/v1/voice/tts/{stream_id}/{index}?{query}")
+        return str(response)
+    
+    @staticmethod
+    def _sign_tts_segment(stream_id: str, segment: int, text: str) -> str:
+        """HMAC of a sentence clip URL, so the TTS route only speaks scripts this service wrote"""
+        message = f"{stream_id}|{segment}|{text}".encode()
+        return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+    
+    async def stream_tts_segment(
+        self,
+        stream_id: str,
+        segment: int,
+        text: Optional[str] = None,
+        sig: Optional[str] = None
+    ) -> Optional[AsyncIterator[bytes]]:
+        """
+        Get the audio stream for one sentence of a live call script
+        Starts synthesizing the following sentence so it is ready when Twilio asks.
+        A stream this process doesn't hold (another worker, or expired) is spoken from
+        the signed `text` in the URL. Synthesis is started before returning, so a failure
+        returns None instead of cutting off a clip mid-response.
+        """
+        sentences = self._tts_segments.get(stream_id)
+        if sentences is not None and 0 <= segment < len(sentences):
+            text = sentences[segment]
+            self._prefetch_tts_segment(stream_id, segment + 1)
+            prefetched = self._tts_prefetch.pop((stream_id, segment), None)
+            if prefetched is not None:
+                try:
+                    audio = await prefetched
+                    return self._iter_bytes(audio)
+                except Exception as e:
+                    logger.warning(f"⚠️ Prefetched TTS clip failed, synthesizing live: {e}")
+        elif not (text and sig and hmac.compare_digest(sig, self._sign_tts_segment(stream_id, segment, text))):
+            return None
+        
+        # Open the live stream before the response starts so failures surface as a 404
+        stream = openai_service.stream_speech(text)
+        try:
+            first = await stream.__anext__()
+        except StopAsyncIteration:
+            first = b""
+        except Exception as e:
+            logger.error(f"TTS synthesis failed: {e}")
+            await stream.aclose()
+            return None
+        return self._iter_stream(first, stream)
+    
+    def _prefetch_tts_segment(self, stream_id: str, segment: int):
+        """Start synthesizing a sentence clip in the background"""
+        sentences = self._tts_segments.get(stream_id)
+        key = (stream_id, segment)
+        if sentences is None or segment >= len(sentences) or key in self._tts_prefetch:
+            return
+        self._tts_prefetch[key] = asyncio.create_task(self._synthesize_segment(sentences[segment]))
+    
+    async def _synthesize_segment(self, text: str) -> bytes:
+        """Synthesize a full sentence clip into memory"""
+        return b"".join([chunk async for chunk in openai_service.stream_speech(text)])
+    
+    @staticmethod
+    async def _iter_bytes(audio: bytes) -> AsyncIterator[bytes]:
+        """Yield an already synthesized clip"""
+        yield audio
+    
+    @staticmethod
+    async def _iter_stream(first: bytes, stream: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """Yield the chunk already read from a live stream, then the rest of it"""
+        yield first
+        async for chunk in stream:
+            yield chunk
+    
     async def _log_intelligent_call(self, analysis: TransactionAnalysis, script: str, call_result: Dict):
         """Log detailed call information for analytics"""
         
         call_log = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": call_result.get("timestamp") or datetime.now().isoformat(),
             "service": "intelligent_voice_caller",
             "customer_id": analysis.customer.customer_id,
             "customer_name": analysis.customer.name,
@@ -384,13 +730,17 @@ Generate ONLY the spoken script, no stage directions or formatting:
         }
         
         self.call_history.append(call_log)
-        logger.info(f"📋 Intelligent Call Logged: {json.dumps(call_log, indent=2)}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("📋 Intelligent Call Logged: %s", orjson.dumps(call_log).decode())
     
     def _mask_phone(self, phone: str) -> str:
         """Mask phone number for privacy"""
-        if len(phone) < 4:
-            return "***"
-        return phone[:-4] + "****"
+        return "***" if len(phone) < 4 else f"{phone[:-4]}****"
+    
+    async def shutdown(self):
+        """Wait for outstanding call-log tasks to finish"""
+        if self._pending_logs:
+            await asyncio.gather(*self._pending_logs, return_exceptions=True)
     
     def get_call_statistics(self) -> Dict[str, Any]:
         """Get comprehensive call statistics"""
@@ -401,6 +751,7 @@ Generate ONLY the spoken script, no stage directions or formatting:
             "demo_mode": self.demo_mode,
             "provider": "twilio" if not self.demo_mode else "intelligent_demo",
             "call_history_count": len(self.call_history),
+            "calls_in_flight": settings.MAX_CONCURRENT_CALLS - self._call_sem._value,
             "service_status": "operational"
         }
 
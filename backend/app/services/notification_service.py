@@ -5,9 +5,18 @@ Main service that coordinates email and phone notifications for anomaly detectio
 
 import logging
 import asyncio
+import os
 import uuid
-from typing import Dict, List, Optional, Tuple
-from datetime import datetime, timedelta
+import time
+import hashlib
+import itertools
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+from datetime import datetime
+
+import numpy as np
+import orjson
+from cachetools import TTLCache
 
 from app.core.config import settings
 from app.models import (
@@ -16,29 +25,187 @@ from app.models import (
     NotificationType, NotificationStatus
 )
 from app.services.openai_service import openai_service
-from app.services.email_service import email_service
+from app.services.email_service import email_service, EmailPayload
 from app.services.phone_service import phone_service
-from app.services.financepulse_voice_service import financepulse_voice_service
+from app.services.financepulse_voice_service import financepulse_voice_service, FraudCallRequest
 
 logger = logging.getLogger(__name__)
 
+# Ordinal of each risk level for threshold comparisons
+_RISK_ORDER: Dict[RiskLevel, int] = {
+    RiskLevel.LOW: 0,
+    RiskLevel.MEDIUM: 1,
+    RiskLevel.HIGH: 2,
+    RiskLevel.CRITICAL: 3,
+}
+
+
+async def _collect_batch(queue: asyncio.Queue, window: float, max_size: int) -> list:
+    """Wait for one queued item, then keep collecting until the window closes or the batch is full"""
+    loop = asyncio.get_running_loop()
+    batch = [await queue.get()]
+    deadline = loop.time() + window
+    
+    try:
+        while len(batch) < max_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+    except asyncio.CancelledError:
+        # Return collected items so a shutdown drain still sees them
+        for item in batch:
+            queue.put_nowait(item)
+        raise
+    
+    return batch
+
+
+def _read_tail_lines(path: str, count: int, block_size: int = 64 * 1024) -> List[bytes]:
+    """Last `count` non-empty lines of a file, read backwards from the end in blocks"""
+    with open(path, "rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        data = b""
+        while pos > 0 and data.count(b"\n") <= count:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    lines = data.split(b"\n")
+    # The first line is partial unless the read reached the start of the file
+    if pos > 0:
+        lines = lines[1:]
+    return [line for line in lines if line][-count:]
+
+
+def _drain(queue: Optional[asyncio.Queue]) -> list:
+    """Take everything currently in a queue without waiting"""
+    items = []
+    while queue is not None and not queue.empty():
+        items.append(queue.get_nowait())
+    return items
+
+
+class AsyncTokenBucket:
+    """Token bucket that paces outbound provider requests to a requests-per-minute rate"""
+    
+    def __init__(self, rpm: int):
+        self.rpm = max(1, rpm)
+        self.tokens = float(self.rpm)
+        self.last_update = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        """Wait until a token is available and consume it"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.tokens + (now - self.last_update) * self.rpm / 60, self.rpm)
+                self.last_update = now
+                
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                
+                await asyncio.sleep((1 - self.tokens) * 60 / self.rpm)
+
 
 class NotificationOrchestrator:
     """Main notification orchestrator service"""
     
+    # Emails queued within this window are sent together over one SMTP session
+    _EMAIL_BATCH_WINDOW = 0.05
+    _EMAIL_BATCH_MAX = 100
+    # At most this many batches hold an SMTP session at once
+    _EMAIL_BATCH_CONCURRENCY = 4
+    
+    # Calls queued within this window are handed to the voice service together
+    _VOICE_BATCH_WINDOW = 0.1
+    _VOICE_BATCH_MAX = 50
+    
+    # Anomalies from the transaction stream within this window share one batch decision pass
+    _ANOMALY_BATCH_WINDOW = 0.25
+    _ANOMALY_BATCH_MAX = 256
+    
+    # Popups queued within this window go out as one WebSocket broadcast
+    _POPUP_BATCH_WINDOW = 0.02
+    _POPUP_BATCH_MAX = 64
+    
+    # History records are appended to disk in batches of up to this size or once a second
+    _HISTORY_FLUSH_MAX = 256
+    _HISTORY_FLUSH_INTERVAL = 1.0
+    # Past this size the history file is compacted down to the records kept in memory
+    _HISTORY_FILE_MAX_BYTES = 1 << 20
+    
+    # Per-customer mutable state is split across this many dicts (a power of two)
+    _SHARD_COUNT = 1 << (max(8, os.cpu_count() or 1) - 1).bit_length()
+    
+    # How often expired cooldowns and stale daily counts are pruned (seconds)
+    _JANITOR_INTERVAL = 300
+    
     def __init__(self):
-        self.notification_history: List[NotificationRecord] = []
+        # Bounded history: oldest records are evicted on append
+        self.notification_history: Deque[NotificationRecord] = deque(maxlen=1000)
         self.customer_contacts: Dict[str, CustomerContact] = {}
         self.customer_settings: Dict[str, NotificationSettings] = {}
-        self.notification_cooldowns: Dict[str, datetime] = {}
-        self.daily_notification_counts: Dict[str, Dict[str, int]] = {}
+        # Monotonic tick of each customer's last notification
+        self.notification_cooldowns: Tuple[Dict[str, float], ...] = tuple({} for _ in range(self._SHARD_COUNT))
+        self.daily_notification_counts: Tuple[Dict[str, Dict[str, int]], ...] = tuple({} for _ in range(self._SHARD_COUNT))
+        self._today_key = ""
+        self._today_key_epoch = 0
+        
+        # Per-customer settings as parallel arrays for the batch decision path
+        self._customer_index: Dict[str, int] = {}
+        self._email_on = np.zeros(0, dtype=bool)
+        self._phone_on = np.zeros(0, dtype=bool)
+        self._email_thresh = np.zeros(0, dtype=np.int8)
+        self._phone_thresh = np.zeros(0, dtype=np.int8)
+        self._max_daily = np.zeros(0, dtype=np.int32)
+        self._quiet_active = np.zeros(0, dtype=bool)
+        self._quiet_start = np.zeros(0, dtype=np.int8)
+        self._quiet_span = np.zeros(0, dtype=np.int8)
         self.is_initialized = False
+        self._email_batch_queue: Optional[asyncio.Queue] = None
+        self._email_batch_task: Optional[asyncio.Task] = None
+        self._email_batch_sem = asyncio.Semaphore(self._EMAIL_BATCH_CONCURRENCY)
+        self._janitor_task: Optional[asyncio.Task] = None
+        self._history_writer: Optional[asyncio.Queue] = None
+        self._history_writer_task: Optional[asyncio.Task] = None
+        self._ws_manager = None
+        self._last_iso: Tuple[Optional[datetime], str] = (None, "")
+        self._ws_out_queue: Optional[asyncio.Queue] = None
+        self._ws_coalescer_task: Optional[asyncio.Task] = None
+        self._inflight_calls: Set[str] = set()
+        self._voice_batch_queue: Optional[asyncio.Queue] = None
+        self._voice_batch_task: Optional[asyncio.Task] = None
+        self._anomaly_queue: Optional[asyncio.Queue] = None
+        self._anomaly_batch_task: Optional[asyncio.Task] = None
+        # Batches handed off by the collectors and still being sent
+        self._pending_batches: Set[asyncio.Task] = set()
+        self._email_bucket: Optional[AsyncTokenBucket] = None
+        self._voice_bucket: Optional[AsyncTokenBucket] = None
+        
+        # Results of recent sends, so duplicate anomalies within the cooldown are not re-sent
+        self._response_cache: TTLCache = TTLCache(maxsize=10_000, ttl=settings.NOTIFICATION_COOLDOWN)
+        
+        # Configuration read on every decision, copied from settings in initialize()
+        self._email_enabled_global = settings.ENABLE_EMAIL_NOTIFICATIONS
+        self._phone_enabled_global = settings.ENABLE_PHONE_NOTIFICATIONS
+        self._cooldown_s = settings.NOTIFICATION_COOLDOWN
         
     async def initialize(self) -> bool:
         """Initialize notification orchestrator and all services"""
         try:
             logger.info("🔔 Initializing notification orchestrator...")
             
+            # Snapshot decision settings
+            self._email_enabled_global = settings.ENABLE_EMAIL_NOTIFICATIONS
+            self._phone_enabled_global = settings.ENABLE_PHONE_NOTIFICATIONS
+            self._cooldown_s = settings.NOTIFICATION_COOLDOWN
+            
             # Initialize all services
             services_status = {}
             
@@ -57,6 +224,39 @@ class NotificationOrchestrator:
             # Load mock customer data
             await self._load_mock_customer_data()
             
+            # Resolve the WebSocket manager once (imported late to avoid circular imports)
+            from main import websocket_manager
+            self._ws_manager = websocket_manager
+            self._ws_out_queue = asyncio.Queue()
+            self._ws_coalescer_task = asyncio.create_task(self._popup_coalescer())
+            
+            # Pace outbound requests to each provider
+            self._email_bucket = AsyncTokenBucket(settings.EMAIL_RPM)
+            self._voice_bucket = AsyncTokenBucket(settings.VOICE_RPM)
+            
+            # Start the email batching worker
+            self._email_batch_queue = asyncio.Queue()
+            self._email_batch_task = asyncio.create_task(self._email_batch_worker())
+            
+            # Start the voice call batching worker
+            self._voice_batch_queue = asyncio.Queue()
+            self._voice_batch_task = asyncio.create_task(self._voice_batch_worker())
+            
+            # Start the anomaly batching worker fed by the transaction stream
+            self._anomaly_queue = asyncio.Queue()
+            self._anomaly_batch_task = asyncio.create_task(self._anomaly_batch_worker())
+            
+            # Restore persisted history and start the write-behind writer
+            if settings.NOTIFICATION_HISTORY_FILE:
+                await self._load_persisted_history(settings.NOTIFICATION_HISTORY_FILE)
+                self._history_writer = asyncio.Queue()
+                self._history_writer_task = asyncio.create_task(
+                    self._history_writer_loop(settings.NOTIFICATION_HISTORY_FILE)
+                )
+            
+            # Start pruning of expired per-customer state
+            self._janitor_task = asyncio.create_task(self._janitor_loop())
+            
             self.is_initialized = True
             
             # Log service status
@@ -86,7 +286,14 @@ class NotificationOrchestrator:
         
         results = {"email": False, "phone": False}
         
+        cache_key, cached = self._check_response_cache(transaction, anomaly_result)
+        if cached is not None:
+            return cached
+        
         try:
+            # One wall-clock read per anomaly, shared by every record and broadcast
+            now = datetime.utcnow()
+            
             # Get customer contact information
             customer_contact = self.customer_contacts.get(transaction.customer_id)
             if not customer_contact:
@@ -94,11 +301,9 @@ class NotificationOrchestrator:
                 return results
             
             # Get customer notification settings
-            settings_key = transaction.customer_id
-            customer_settings = self.customer_settings.get(
-                settings_key,
-                NotificationSettings(customer_id=transaction.customer_id)
-            )
+            customer_settings = self.customer_settings.get(transaction.customer_id)
+            if customer_settings is None:
+                customer_settings = NotificationSettings(customer_id=transaction.customer_id)
             
             # Check if notifications should be sent based on risk level
             should_email = self._should_send_email(anomaly_result, customer_contact, customer_settings)
@@ -110,60 +315,264 @@ class NotificationOrchestrator:
                 return results
             
             # Check daily limits
-            if self._exceeds_daily_limit(transaction.customer_id, customer_settings):
+            today = self._current_day_key(now)
+            if self._exceeds_daily_limit(transaction.customer_id, customer_settings, today):
                 logger.info(f"Customer {transaction.customer_id} has exceeded daily notification limit")
                 return results
             
-            # Send notifications
-            notification_tasks = []
+            return await self._dispatch_notifications(
+                transaction, anomaly_result, customer_contact,
+                should_email, should_phone, now, today, cache_key
+            )
             
-            if should_email:
-                notification_tasks.append(
-                    self._send_email_notification(
-                        transaction, anomaly_result, customer_contact
-                    )
-                )
+        except Exception as e:
+            logger.error(f"Error processing anomaly notification: {e}")
+            return results
+    
+    async def process_anomaly_notifications_batch(
+        self,
+        transactions: List[Transaction],
+        anomaly_results: List[AnomalyResult]
+    ) -> List[Dict[str, bool]]:
+        """
+        Process a batch of anomalies, computing all send decisions as array operations
+        Returns one result dict per anomaly, in input order
+        """
+        count = len(transactions)
+        batch_results = [{"email": False, "phone": False} for _ in range(count)]
+        if not self.is_initialized:
+            logger.warning("Notification orchestrator not initialized")
+            return batch_results
+        if not count or not self._customer_index:
+            return batch_results
+        
+        try:
+            now = datetime.utcnow()
+            today = self._current_day_key(now)
+            tick = time.monotonic()
+            customer_ids = [transaction.customer_id for transaction in transactions]
             
-            if should_phone:
-                notification_tasks.append(
-                    self._send_phone_notification(
-                        transaction, anomaly_result, customer_contact
-                    )
-                )
+            # Duplicates already answered from the response cache are not re-sent
+            pending = np.ones(count, dtype=bool)
+            cache_keys = []
+            for i, (transaction, anomaly_result) in enumerate(zip(transactions, anomaly_results)):
+                cache_key, cached = self._check_response_cache(transaction, anomaly_result)
+                cache_keys.append(cache_key)
+                if cached is not None:
+                    batch_results[i] = cached
+                    pending[i] = False
             
-            # Execute notifications concurrently
-            if notification_tasks:
-                notification_results = await asyncio.gather(*notification_tasks, return_exceptions=True)
-                
-                # Process results
-                if should_email:
-                    results["email"] = isinstance(notification_results[0], bool) and notification_results[0]
-                if should_phone:
-                    phone_index = 1 if should_email else 0
-                    if phone_index < len(notification_results):
-                        results["phone"] = isinstance(notification_results[phone_index], bool) and notification_results[phone_index]
-                
-                # Update cooldown and daily counts
-                if any(results.values()):
-                    self._update_cooldown(transaction.customer_id)
-                    self._increment_daily_count(transaction.customer_id)
+            # Gather per-anomaly state into arrays
+            idx = np.fromiter((self._customer_index.get(cid, -1) for cid in customer_ids), dtype=np.int64, count=count)
+            known = idx >= 0
+            idx[~known] = 0
+            risk = np.fromiter((_RISK_ORDER[r.risk_level] for r in anomaly_results), dtype=np.int8, count=count)
+            shards = [self._shard(cid) for cid in customer_ids]
+            last_sent = np.fromiter(
+                (self.notification_cooldowns[shard].get(cid, -np.inf) for shard, cid in zip(shards, customer_ids)),
+                dtype=np.float64, count=count
+            )
+            sent_today = np.fromiter(
+                (self.daily_notification_counts[shard].get(cid, {}).get(today, 0) for shard, cid in zip(shards, customer_ids)),
+                dtype=np.int32, count=count
+            )
             
-            # Log results
-            sent_methods = [method for method, success in results.items() if success]
-            if sent_methods:
-                logger.info(f"📢 Sent {anomaly_result.risk_level.value} risk notifications via {', '.join(sent_methods)} to customer {transaction.customer_id}")
+            # Cooldown and daily limit
+            eligible = (
+                pending & known
+                & (tick - last_sent >= self._cooldown_s)
+                & (sent_today < self._max_daily[idx])
+            )
             
-            return results
+            email_mask = (
+                eligible & self._email_enabled_global
+                & self._email_on[idx] & (risk >= self._email_thresh[idx])
+            )
+            
+            quiet = self._quiet_active[idx] & ((now.hour - self._quiet_start[idx]) % 24 <= self._quiet_span[idx])
+            phone_mask = (
+                eligible & self._phone_enabled_global
+                & self._phone_on[idx] & (risk >= self._phone_thresh[idx]) & ~quiet
+            )
+            
+            # Only the first anomaly per customer is sent; the cooldown covers the rest
+            selected = np.flatnonzero(email_mask | phone_mask)
+            _, first = np.unique(idx[selected], return_index=True)
+            selected = np.sort(selected[first])
+            
+            dispatched = await asyncio.gather(*(
+                self._dispatch_notifications(
+                    transactions[i], anomaly_results[i], self.customer_contacts[customer_ids[i]],
+                    bool(email_mask[i]), bool(phone_mask[i]), now, today, cache_keys[i]
+                )
+                for i in selected.tolist()
+            ), return_exceptions=True)
+            
+            for i, results in zip(selected.tolist(), dispatched):
+                if isinstance(results, dict):
+                    batch_results[i] = results
+            
+            return batch_results
             
         except Exception as e:
-            logger.error(f"Error processing anomaly notification: {e}")
-            return results
+            logger.error(f"Error processing anomaly notification batch: {e}")
+            return batch_results
+    
+    def submit_anomaly(self, transaction: Transaction, anomaly_result: AnomalyResult):
+        """Queue an anomaly for the next batch decision pass without waiting for its notifications"""
+        if self._anomaly_queue is None:
+            self._track_batch(self._process_anomaly_batch([(transaction, anomaly_result)]))
+            return
+        self._anomaly_queue.put_nowait((transaction, anomaly_result))
+    
+    async def _anomaly_batch_worker(self):
+        """Collect submitted anomalies for a short window and decide each batch in one pass"""
+        while True:
+            batch = await _collect_batch(self._anomaly_queue, self._ANOMALY_BATCH_WINDOW, self._ANOMALY_BATCH_MAX)
+            self._track_batch(self._process_anomaly_batch(batch))
+    
+    async def _process_anomaly_batch(self, batch: List[Tuple[Transaction, AnomalyResult]]):
+        """Run the batch decision path for submitted anomalies and log what was sent"""
+        transactions = [transaction for transaction, _ in batch]
+        batch_results = await self.process_anomaly_notifications_batch(
+            transactions, [anomaly_result for _, anomaly_result in batch]
+        )
+        for transaction, results in zip(transactions, batch_results):
+            if any(results.values()):
+                logger.info(f"📲 Notifications sent for transaction {transaction.id}: {results}")
+    
+    def _check_response_cache(
+        self, 
+        transaction: Transaction, 
+        anomaly_result: AnomalyResult
+    ) -> Tuple[Optional[bytes], Optional[Dict[str, bool]]]:
+        """Return the cache key and, if this anomaly must not be sent, the results to return instead"""
+        cache_mode = settings.NOTIFICATION_CACHE_MODE
+        if cache_mode == "disabled":
+            return None, None
+        
+        cache_key = hashlib.sha256(
+            f"{transaction.customer_id}|{transaction.id}|{anomaly_result.risk_level.value}".encode()
+        ).digest()
+        cached = self._response_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"♻️ Duplicate anomaly for transaction {transaction.id}, reusing previous notification results")
+            return cache_key, dict(cached)
+        if cache_mode == "replay":
+            # Replay only serves recorded decisions and never sends
+            return cache_key, {"email": False, "phone": False}
+        return cache_key, None
+    
+    async def _dispatch_notifications(
+        self,
+        transaction: Transaction,
+        anomaly_result: AnomalyResult,
+        customer_contact: CustomerContact,
+        should_email: bool,
+        should_phone: bool,
+        now: datetime,
+        today: str,
+        cache_key: Optional[bytes]
+    ) -> Dict[str, bool]:
+        """Send the selected notifications and record cooldown, daily count and cache entry"""
+        results = {"email": False, "phone": False}
+        
+        # Send notifications, concurrently only when both channels fire
+        if should_email and should_phone:
+            email_ok, phone_ok = await asyncio.gather(
+                self._send_email_notification(transaction, anomaly_result, customer_contact, now),
+                self._send_phone_notification(transaction, anomaly_result, customer_contact, now),
+                return_exceptions=True
+            )
+            results["email"] = email_ok is True
+            results["phone"] = phone_ok is True
+        elif should_email:
+            results["email"] = await self._safe_send(
+                self._send_email_notification(transaction, anomaly_result, customer_contact, now)
+            )
+        elif should_phone:
+            results["phone"] = await self._safe_send(
+                self._send_phone_notification(transaction, anomaly_result, customer_contact, now)
+            )
+        
+        if should_email or should_phone:
+            # Update cooldown and daily counts
+            if any(results.values()):
+                self._update_cooldown(transaction.customer_id)
+                self._increment_daily_count(transaction.customer_id, today)
+                
+                if cache_key is not None and settings.NOTIFICATION_CACHE_MODE == "enabled":
+                    self._response_cache[cache_key] = dict(results)
+        
+        # Log results
+        sent_methods = [method for method, success in results.items() if success]
+        if sent_methods:
+            logger.info(f"📢 Sent {anomaly_result.risk_level.value} risk notifications via {', '.join(sent_methods)} to customer {transaction.customer_id}")
+        
+        return results
+    
+    def _rebuild_decision_arrays(self):
+        """Rebuild the per-customer arrays used by the batch decision path"""
+        customer_ids = list(self.customer_contacts)
+        size = len(customer_ids)
+        
+        email_on = np.zeros(size, dtype=bool)
+        phone_on = np.zeros(size, dtype=bool)
+        email_thresh = np.zeros(size, dtype=np.int8)
+        phone_thresh = np.zeros(size, dtype=np.int8)
+        max_daily = np.zeros(size, dtype=np.int32)
+        quiet_active = np.zeros(size, dtype=bool)
+        quiet_start = np.zeros(size, dtype=np.int8)
+        quiet_span = np.zeros(size, dtype=np.int8)
+        
+        self._customer_index = {customer_id: i for i, customer_id in enumerate(customer_ids)}
+        self._email_on, self._phone_on = email_on, phone_on
+        self._email_thresh, self._phone_thresh = email_thresh, phone_thresh
+        self._max_daily = max_daily
+        self._quiet_active, self._quiet_start, self._quiet_span = quiet_active, quiet_start, quiet_span
+        
+        for i, customer_id in enumerate(customer_ids):
+            self._write_decision_row(i, customer_id)
+    
+    def _sync_decision_row(self, customer_id: str):
+        """Refresh one customer's entry in the decision arrays after a CRUD update"""
+        i = self._customer_index.get(customer_id)
+        if i is None:
+            self._rebuild_decision_arrays()
+        else:
+            self._write_decision_row(i, customer_id)
+    
+    def _write_decision_row(self, i: int, customer_id: str):
+        """Copy a customer's contact and settings fields into row i of the decision arrays"""
+        contact = self.customer_contacts[customer_id]
+        customer_settings = self.customer_settings.get(customer_id) or NotificationSettings(customer_id=customer_id)
+        
+        self._email_on[i] = contact.email_notifications_enabled and customer_settings.email_enabled
+        self._phone_on[i] = contact.phone_notifications_enabled and customer_settings.phone_enabled
+        self._email_thresh[i] = _RISK_ORDER[customer_settings.email_threshold]
+        self._phone_thresh[i] = _RISK_ORDER[customer_settings.phone_threshold]
+        self._max_daily[i] = customer_settings.max_daily_notifications
+        
+        start, end = customer_settings.quiet_hours_start, customer_settings.quiet_hours_end
+        quiet_active = bool(start and end)
+        self._quiet_active[i] = quiet_active
+        self._quiet_start[i] = start if quiet_active else 0
+        self._quiet_span[i] = (end - start) % 24 if quiet_active else 0
+    
+    @staticmethod
+    async def _safe_send(send) -> bool:
+        """Await a single send, treating an exception as a failed delivery"""
+        try:
+            return await send is True
+        except Exception:
+            return False
     
     async def _send_email_notification(
         self, 
         transaction: Transaction, 
         anomaly_result: AnomalyResult, 
-        customer_contact: CustomerContact
+        customer_contact: CustomerContact,
+        now: datetime
     ) -> bool:
         """Send email notification"""
         try:
@@ -171,12 +580,12 @@ class NotificationOrchestrator:
                 logger.warning(f"No email address for customer {customer_contact.customer_id}")
                 return False
             
-            success = await email_service.send_anomaly_notification(
+            success = await self._queue_email(EmailPayload(
                 transaction=transaction,
                 anomaly_result=anomaly_result,
                 recipient_email=customer_contact.email,
                 customer_name=customer_contact.name
-            )
+            ))
             
             # Log notification record
             await self._log_notification_record(
@@ -185,7 +594,8 @@ class NotificationOrchestrator:
                 NotificationType.EMAIL,
                 customer_contact.email,
                 anomaly_result.risk_level,
-                success
+                success,
+                now
             )
             
             # Broadcast email notification to frontend if successful
@@ -197,7 +607,7 @@ class NotificationOrchestrator:
                     "customer_name": customer_contact.name,
                     "email": customer_contact.email,
                     "risk_level": anomaly_result.risk_level.value,
-                    "timestamp": datetime.utcnow().isoformat()
+                    "timestamp": self._iso_timestamp(now)
                 })
             
             return success
@@ -206,11 +616,84 @@ class NotificationOrchestrator:
             logger.error(f"Error sending email notification: {e}")
             return False
     
+    async def _queue_email(self, payload: EmailPayload) -> bool:
+        """Queue an email for the next batch and wait for its delivery result"""
+        if self._email_batch_queue is None:
+            return await email_service.send_anomaly_notification(
+                transaction=payload.transaction,
+                anomaly_result=payload.anomaly_result,
+                recipient_email=payload.recipient_email,
+                customer_name=payload.customer_name
+            )
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._email_batch_queue.put((payload, future))
+        return await future
+    
+    async def _email_batch_worker(self):
+        """Collect queued emails for a short window and flush each batch without waiting for it"""
+        while True:
+            batch = await _collect_batch(self._email_batch_queue, self._EMAIL_BATCH_WINDOW, self._EMAIL_BATCH_MAX)
+            self._track_batch(self._send_email_batch(batch))
+    
+    async def _send_email_batch(self, batch: List[Tuple[EmailPayload, asyncio.Future]]):
+        """Flush one email batch, failing its futures if the flush errors"""
+        try:
+            async with self._email_batch_sem:
+                await self._flush_email_batch(batch)
+        except Exception as e:
+            logger.error(f"Error flushing email batch: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(False)
+    
+    def _coalesce_pending(
+        self, batch: List[Tuple[EmailPayload, asyncio.Future]]
+    ) -> List[Tuple[EmailPayload, List[asyncio.Future]]]:
+        """Group queued emails by recipient so each address gets a single message"""
+        groups: Dict[str, Tuple[EmailPayload, List[asyncio.Future]]] = {}
+        for payload, future in batch:
+            group = groups.get(payload.recipient_email)
+            if group is None:
+                groups[payload.recipient_email] = (payload, [future])
+            else:
+                group[0].related.append(payload)
+                group[1].append(future)
+        return list(groups.values())
+    
+    async def _flush_email_batch(self, batch: List[Tuple[EmailPayload, asyncio.Future]]):
+        """Send a batch of queued emails and resolve their waiting futures"""
+        groups = self._coalesce_pending(batch)
+        
+        # One token per outbound message
+        if self._email_bucket:
+            for _ in groups:
+                await self._email_bucket.acquire()
+        
+        if len(groups) == 1 and not groups[0][0].related:
+            payload = groups[0][0]
+            results = [await email_service.send_anomaly_notification(
+                transaction=payload.transaction,
+                anomaly_result=payload.anomaly_result,
+                recipient_email=payload.recipient_email,
+                customer_name=payload.customer_name
+            )]
+        else:
+            results = await email_service.send_anomaly_notifications_bulk(
+                [payload for payload, _ in groups]
+            )
+        
+        for (_, futures), success in zip(groups, results):
+            for future in futures:
+                if not future.done():
+                    future.set_result(success)
+    
     async def _send_phone_notification(
         self, 
         transaction: Transaction, 
         anomaly_result: AnomalyResult, 
-        customer_contact: CustomerContact
+        customer_contact: CustomerContact,
+        now: datetime
     ) -> bool:
         """Send phone notification using integrated voice service"""
         try:
@@ -218,13 +701,25 @@ class NotificationOrchestrator:
                 logger.warning(f"No phone number for customer {customer_contact.customer_id}")
                 return False
             
+            # Skip duplicate calls to a number that is already being called
+            if customer_contact.phone in self._inflight_calls:
+                logger.info(f"📞 Call to {customer_contact.phone} already in progress, skipping duplicate")
+                return False
+            
             # Use the new integrated voice service for fraud alert calls
-            call_result = await financepulse_voice_service.make_fraud_alert_call(
-                phone_number=customer_contact.phone,
-                customer_name=customer_contact.name,
-                transaction=transaction,
-                anomaly_result=anomaly_result
-            )
+            self._inflight_calls.add(customer_contact.phone)
+            try:
+                if self._voice_bucket:
+                    await self._voice_bucket.acquire()
+                
+                call_result = await self._queue_call(FraudCallRequest(
+                    phone_number=customer_contact.phone,
+                    customer_name=customer_contact.name,
+                    transaction=transaction,
+                    anomaly_result=anomaly_result
+                ))
+            finally:
+                self._inflight_calls.discard(customer_contact.phone)
             
             success = call_result.get('success', False)
             
@@ -235,7 +730,8 @@ class NotificationOrchestrator:
                 NotificationType.PHONE,
                 customer_contact.phone,
                 anomaly_result.risk_level,
-                success
+                success,
+                now
             )
             
             # Broadcast phone notification to frontend if successful
@@ -249,7 +745,7 @@ class NotificationOrchestrator:
                     "call_sid": call_result.get('call_sid', 'N/A'),
                     "call_provider": call_result.get('provider', 'unknown'),
                     "risk_level": anomaly_result.risk_level.value,
-                    "timestamp": datetime.utcnow().isoformat()
+                    "timestamp": self._iso_timestamp(now)
                 })
                 
                 logger.info(f"📞 VOICE CALL SUCCESS: {call_result.get('message', 'Call completed')}")
@@ -262,6 +758,48 @@ class NotificationOrchestrator:
             logger.error(f"Error sending voice notification: {e}")
             return False
     
+    async def _queue_call(self, call: FraudCallRequest) -> Dict:
+        """Queue a call for the next voice batch and wait for its result"""
+        if self._voice_batch_queue is None:
+            return await financepulse_voice_service.make_fraud_alert_call(
+                phone_number=call.phone_number,
+                customer_name=call.customer_name,
+                transaction=call.transaction,
+                anomaly_result=call.anomaly_result
+            )
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._voice_batch_queue.put((call, future))
+        return await future
+    
+    async def _voice_batch_worker(self):
+        """Collect queued calls for a short window and dispatch each batch without waiting for it"""
+        while True:
+            batch = await _collect_batch(self._voice_batch_queue, self._VOICE_BATCH_WINDOW, self._VOICE_BATCH_MAX)
+            
+            # The voice service's call semaphore bounds how many calls run at once
+            self._track_batch(self._dispatch_call_batch(batch))
+    
+    def _track_batch(self, coro):
+        """Run a batch send in the background, keeping a reference until it finishes"""
+        task = asyncio.create_task(coro)
+        self._pending_batches.add(task)
+        task.add_done_callback(self._pending_batches.discard)
+    
+    async def _dispatch_call_batch(self, batch: List[Tuple[FraudCallRequest, asyncio.Future]]):
+        """Place a batch of queued calls and resolve their waiting futures"""
+        try:
+            call_results = await financepulse_voice_service.make_fraud_alert_calls_bulk(
+                [call for call, _ in batch]
+            )
+        except Exception as e:
+            logger.error(f"Error dispatching voice call batch: {e}")
+            call_results = [{"success": False, "error": str(e)}] * len(batch)
+        
+        for (_, future), call_result in zip(batch, call_results):
+            if not future.done():
+                future.set_result(call_result)
+    
     def _should_send_email(
         self, 
         anomaly_result: AnomalyResult, 
@@ -269,7 +807,7 @@ class NotificationOrchestrator:
         customer_settings: NotificationSettings
     ) -> bool:
         """Determine if email notification should be sent"""
-        if not settings.ENABLE_EMAIL_NOTIFICATIONS:
+        if not self._email_enabled_global:
             return False
         
         if not customer_contact.email_notifications_enabled:
@@ -279,12 +817,7 @@ class NotificationOrchestrator:
             return False
         
         # Check risk level threshold
-        risk_levels = [RiskLevel.LOW, RiskLevel.MEDIUM, RiskLevel.HIGH, RiskLevel.CRITICAL]
-        
-        email_threshold_index = risk_levels.index(customer_settings.email_threshold)
-        anomaly_risk_index = risk_levels.index(anomaly_result.risk_level)
-        
-        return anomaly_risk_index >= email_threshold_index
+        return _RISK_ORDER[anomaly_result.risk_level] >= _RISK_ORDER[customer_settings.email_threshold]
     
     def _should_send_phone(
         self, 
@@ -293,7 +826,7 @@ class NotificationOrchestrator:
         customer_settings: NotificationSettings
     ) -> bool:
         """Determine if phone notification should be sent"""
-        if not settings.ENABLE_PHONE_NOTIFICATIONS:
+        if not self._phone_enabled_global:
             return False
         
         if not customer_contact.phone_notifications_enabled:
@@ -308,57 +841,98 @@ class NotificationOrchestrator:
             return False
         
         # Check risk level threshold
-        risk_levels = [RiskLevel.LOW, RiskLevel.MEDIUM, RiskLevel.HIGH, RiskLevel.CRITICAL]
-        
-        phone_threshold_index = risk_levels.index(customer_settings.phone_threshold)
-        anomaly_risk_index = risk_levels.index(anomaly_result.risk_level)
-        
-        return anomaly_risk_index >= phone_threshold_index
+        return _RISK_ORDER[anomaly_result.risk_level] >= _RISK_ORDER[customer_settings.phone_threshold]
+    
+    def _shard(self, customer_id: str) -> int:
+        """Index of the state shard that owns a customer"""
+        return hash(customer_id) & (self._SHARD_COUNT - 1)
     
     def _is_in_cooldown(self, customer_id: str) -> bool:
         """Check if customer is in notification cooldown period"""
-        last_notification = self.notification_cooldowns.get(customer_id)
-        if not last_notification:
+        last_notification = self.notification_cooldowns[self._shard(customer_id)].get(customer_id)
+        if last_notification is None:
             return False
         
-        cooldown_period = timedelta(seconds=settings.NOTIFICATION_COOLDOWN)
-        return datetime.utcnow() < last_notification + cooldown_period
+        return time.monotonic() - last_notification < self._cooldown_s
+    
+    async def _janitor_loop(self):
+        """Periodically drop expired cooldowns and stale daily counts"""
+        while True:
+            await asyncio.sleep(self._JANITOR_INTERVAL)
+            try:
+                await self._prune_expired_state()
+            except Exception as e:
+                logger.error(f"Error pruning notification state: {e}")
+    
+    async def _prune_expired_state(self):
+        """Remove cooldowns older than twice the cooldown period and counts from past days"""
+        expiry = time.monotonic() - 2 * self._cooldown_s
+        today = self._current_day_key(datetime.utcnow())
+        
+        expired_total = stale_total = 0
+        
+        # One shard at a time, yielding between shards and every 1000 deletions
+        for cooldowns, daily_counts in zip(self.notification_cooldowns, self.daily_notification_counts):
+            expired = [cid for cid, last in cooldowns.items() if last < expiry]
+            for i, customer_id in enumerate(expired, 1):
+                cooldowns.pop(customer_id, None)
+                if i % 1000 == 0:
+                    await asyncio.sleep(0)
+            
+            stale = [cid for cid, counts in daily_counts.items() if today not in counts]
+            for i, customer_id in enumerate(stale, 1):
+                daily_counts.pop(customer_id, None)
+                if i % 1000 == 0:
+                    await asyncio.sleep(0)
+            
+            expired_total += len(expired)
+            stale_total += len(stale)
+            await asyncio.sleep(0)
+        
+        if expired_total or stale_total:
+            logger.debug(f"🧹 Pruned {expired_total} cooldowns and {stale_total} daily counters")
     
-    def _exceeds_daily_limit(self, customer_id: str, customer_settings: NotificationSettings) -> bool:
+    def _current_day_key(self, now: datetime) -> str:
+        """Return the cached ISO day key, rebuilding it only when the UTC date rolls over"""
+        epoch = now.toordinal()
+        if epoch != self._today_key_epoch:
+            self._today_key_epoch = epoch
+            self._today_key = now.date().isoformat()
+            
+            # Counts from earlier days are never read again
+            for shard in self.daily_notification_counts:
+                for daily_counts in shard.values():
+                    for day in [day for day in daily_counts if day != self._today_key]:
+                        del daily_counts[day]
+        
+        return self._today_key
+    
+    def _exceeds_daily_limit(self, customer_id: str, customer_settings: NotificationSettings, today: str) -> bool:
         """Check if daily notification limit is exceeded"""
-        today = datetime.utcnow().date().isoformat()
-        daily_counts = self.daily_notification_counts.get(customer_id, {})
+        daily_counts = self.daily_notification_counts[self._shard(customer_id)].get(customer_id, {})
         today_count = daily_counts.get(today, 0)
         
         return today_count >= customer_settings.max_daily_notifications
     
-    def _is_quiet_hours(self, customer_settings: NotificationSettings) -> bool:
+    @staticmethod
+    def _is_quiet_hours(customer_settings: NotificationSettings) -> bool:
         """Check if current time is within quiet hours"""
         if not customer_settings.quiet_hours_start or not customer_settings.quiet_hours_end:
             return False
         
-        current_hour = datetime.utcnow().hour
         start_hour = customer_settings.quiet_hours_start
         end_hour = customer_settings.quiet_hours_end
         
-        if start_hour <= end_hour:
-            return start_hour <= current_hour <= end_hour
-        else:
-            # Quiet hours span midnight
-            return current_hour >= start_hour or current_hour <= end_hour
+        # Inclusive window measured from the start hour, which also covers spans across midnight
+        return (datetime.utcnow().hour - start_hour) % 24 <= (end_hour - start_hour) % 24
     
     def _update_cooldown(self, customer_id: str):
         """Update notification cooldown for customer"""
-        self.notification_cooldowns[customer_id] = datetime.utcnow()
+        self.notification_cooldowns[self._shard(customer_id)][customer_id] = time.monotonic()
     
-    def _increment_daily_count(self, customer_id: str):
+    def _increment_daily_count(self, customer_id: str, today: str):
         """Increment daily notification count for customer"""
-        today = datetime.utcnow().date().isoformat()
-        
-        if customer_id not in self.daily_notification_counts:
-            self.daily_notification_counts[customer_id] = {}
-        
-        daily_counts = self.daily_notification_counts[customer_id]
+        daily_counts = self.daily_notification_counts[self._shard(customer_id)].setdefault(customer_id, {})
         daily_counts[today] = daily_counts.get(today, 0) + 1
     
     async def _log_notification_record(
@@ -368,12 +942,13 @@ class NotificationOrchestrator:
         notification_type: NotificationType,
         recipient: str,
         risk_level: RiskLevel,
-        success: bool
+        success: bool,
+        timestamp: datetime
     ):
         """Log notification delivery record"""
         try:
             record = NotificationRecord(
-                id=str(uuid.uuid4()),
+                id=uuid.uuid4().hex,
                 customer_id=customer_id,
                 transaction_id=transaction_id,
                 notification_type=notification_type,
@@ -381,19 +956,63 @@ class NotificationOrchestrator:
                 content="Anomaly notification",
                 recipient=recipient,
                 risk_level=risk_level,
-                sent_at=datetime.utcnow() if success else None,
+                sent_at=timestamp if success else None,
                 error_message=None if success else "Failed to send notification"
             )
             
             self.notification_history.append(record)
-            
-            # Keep only last 1000 records to prevent memory bloat
-            if len(self.notification_history) > 1000:
-                self.notification_history = self.notification_history[-1000:]
+            if self._history_writer is not None:
+                self._history_writer.put_nowait(record)
                 
         except Exception as e:
             logger.error(f"Error logging notification record: {e}")
     
+    async def _load_persisted_history(self, path: str):
+        """Load the most recent persisted records into the in-memory history"""
+        def read_tail() -> List[bytes]:
+            try:
+                return _read_tail_lines(path, self.notification_history.maxlen)
+            except FileNotFoundError:
+                return []
+        
+        try:
+            lines = await asyncio.get_running_loop().run_in_executor(None, read_tail)
+            for line in lines:
+                self.notification_history.append(NotificationRecord(**orjson.loads(line)))
+            if lines:
+                logger.info(f"📂 Restored {len(lines)} notification records from {path}")
+        except Exception as e:
+            logger.error(f"Error loading persisted notification history: {e}")
+    
+    async def _history_writer_loop(self, path: str):
+        """Append queued history records to the history file in batches"""
+        while True:
+            batch = await _collect_batch(self._history_writer, self._HISTORY_FLUSH_INTERVAL, self._HISTORY_FLUSH_MAX)
+            await self._write_history(path, batch)
+    
+    async def _write_history(self, path: str, batch: List[NotificationRecord]):
+        """Append a batch of history records to the history file, compacting it when it grows too large"""
+        keep = self.notification_history.maxlen
+        
+        def append(lines: bytes):
+            with open(path, "ab") as f:
+                f.write(lines)
+                size = f.tell()
+            
+            # Ring file: rewrite only the newest records, swapped in atomically
+            if size > self._HISTORY_FILE_MAX_BYTES:
+                tail = _read_tail_lines(path, keep)
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(b"\n".join(tail) + b"\n")
+                os.replace(tmp_path, path)
+        
+        try:
+            lines = b"".join(orjson.dumps(record.model_dump(mode="json")) + b"\n" for record in batch)
+            await asyncio.get_running_loop().run_in_executor(None, append, lines)
+        except Exception as e:
+            logger.error(f"Error persisting notification history: {e}")
+    
     async def _load_mock_customer_data(self):
         """Load mock customer contact information and settings"""
         try:
@@ -438,6 +1057,8 @@ class NotificationOrchestrator:
                 )
                 self.customer_settings[customer_id] = settings
             
+            self._rebuild_decision_arrays()
+            
             logger.info(f"📋 Loaded {len(mock_customers)} mock customer profiles")
             
         except Exception as e:
@@ -450,9 +1071,17 @@ class NotificationOrchestrator:
         history = self.notification_history
         
         if customer_id:
-            history = [record for record in history if record.customer_id == customer_id]
+            # Walk newest-first so we can stop once we have enough matches
+            matches = (record for record in reversed(history) if record.customer_id == customer_id)
+            if limit:
+                matches = itertools.islice(matches, limit)
+            records = list(matches)
+            records.reverse()
+            return records
         
-        return history[-limit:] if limit else history
+        if not limit:
+            return list(history)
+        return list(itertools.islice(history, max(0, len(history) - limit), None))
     
     def get_customer_contact(self, customer_id: str) -> Optional[CustomerContact]:
         """Get customer contact information"""
@@ -468,6 +1097,7 @@ class NotificationOrchestrator:
                 updated_data['updated_at'] = datetime.utcnow()
                 
                 self.customer_contacts[customer_id] = CustomerContact(**updated_data)
+                self._sync_decision_row(customer_id)
                 return True
             return False
         except Exception as e:
@@ -488,6 +1118,8 @@ class NotificationOrchestrator:
                 updated_data['updated_at'] = datetime.utcnow()
                 
                 self.customer_settings[customer_id] = NotificationSettings(**updated_data)
+                if customer_id in self.customer_contacts:
+                    self._sync_decision_row(customer_id)
                 return True
             return False
         except Exception as e:
@@ -497,19 +1129,97 @@ class NotificationOrchestrator:
     async def _broadcast_notification_popup(self, notification_data: dict):
         """Broadcast notification popup to WebSocket clients"""
         try:
-            # Import here to avoid circular imports
-            from main import websocket_manager
+            if self._ws_out_queue is not None:
+                self._ws_out_queue.put_nowait(notification_data)
+                return
             
             message = {
                 "type": "notification_popup",
                 "data": notification_data
             }
             
-            await websocket_manager.broadcast(message)
+            await self._ws_manager.broadcast(message)
             logger.info(f"📱 Notification popup broadcasted: {notification_data['message']}")
             
         except Exception as e:
             logger.error(f"Error broadcasting notification popup: {e}")
+    
+    def _iso_timestamp(self, now: datetime) -> str:
+        """ISO string for a timestamp, reused while the same timestamp is being broadcast"""
+        last_now, last_iso = self._last_iso
+        if last_now is not now:
+            last_iso = now.isoformat()
+            self._last_iso = (now, last_iso)
+        return last_iso
+    
+    async def _popup_coalescer(self):
+        """Collect popups for a short window and broadcast them in a single envelope"""
+        while True:
+            batch = await _collect_batch(self._ws_out_queue, self._POPUP_BATCH_WINDOW, self._POPUP_BATCH_MAX)
+            await self._broadcast_popups(batch)
+    
+    async def _broadcast_popups(self, batch: List[dict]):
+        """Broadcast queued popups in a single envelope"""
+        try:
+            if len(batch) == 1:
+                message = {"type": "notification_popup", "data": batch[0]}
+            else:
+                message = {"type": "notification_popup_batch", "data": batch}
+            
+            await self._ws_manager.broadcast(message)
+            logger.info(f"📱 {len(batch)} notification popup(s) broadcasted")
+            
+        except Exception as e:
+            logger.error(f"Error broadcasting notification popups: {e}")
+    
+    async def shutdown(self):
+        """Stop the background workers, then send everything still queued and flush history to disk"""
+        # Decide queued anomalies first, while the email and voice collectors still run to send them
+        if self._anomaly_batch_task is not None:
+            self._anomaly_batch_task.cancel()
+            await asyncio.gather(self._anomaly_batch_task, return_exceptions=True)
+        anomalies = _drain(self._anomaly_queue)
+        self._anomaly_queue = None
+        for i in range(0, len(anomalies), self._ANOMALY_BATCH_MAX):
+            self._track_batch(self._process_anomaly_batch(anomalies[i:i + self._ANOMALY_BATCH_MAX]))
+        if self._pending_batches:
+            await asyncio.gather(*self._pending_batches, return_exceptions=True)
+        
+        workers = [
+            task for task in (
+                self._email_batch_task, self._voice_batch_task, self._ws_coalescer_task,
+                self._history_writer_task, self._janitor_task
+            ) if task is not None
+        ]
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        
+        # Send queued emails and calls, then wait for every batch still in flight
+        emails = _drain(self._email_batch_queue)
+        for i in range(0, len(emails), self._EMAIL_BATCH_MAX):
+            self._track_batch(self._send_email_batch(emails[i:i + self._EMAIL_BATCH_MAX]))
+        calls = _drain(self._voice_batch_queue)
+        for i in range(0, len(calls), self._VOICE_BATCH_MAX):
+            self._track_batch(self._dispatch_call_batch(calls[i:i + self._VOICE_BATCH_MAX]))
+        if self._pending_batches:
+            await asyncio.gather(*self._pending_batches, return_exceptions=True)
+        
+        # Let callers woken by those results record their outcome before the final flush
+        await asyncio.sleep(0)
+        
+        popups = _drain(self._ws_out_queue)
+        if popups:
+            await self._broadcast_popups(popups)
+        
+        records = _drain(self._history_writer)
+        if records and settings.NOTIFICATION_HISTORY_FILE:
+            await self._write_history(settings.NOTIFICATION_HISTORY_FILE, records)
+        
+        # Anything arriving after shutdown is sent and logged directly
+        self._email_batch_queue = self._voice_batch_queue = None
+        self._ws_out_queue = self._history_writer = None
+        logger.info("🛑 Notification orchestrator shut down")
 
 
 # Global service instance
@@ -5,16 +5,395 @@ Handles AI content generation for email and phone notifications using OpenAI GPT
 
 import logging
 import asyncio
-from typing import Dict, Optional, Tuple
+import gzip
+import hashlib
+import math
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
 from datetime import datetime
 
-from openai import AsyncOpenAI
+import httpx
+import orjson
+from openai import AsyncOpenAI, APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+from tenacity import (
+    before_sleep_log, retry, retry_if_exception_type, stop_after_attempt, wait_random_exponential
+)
 
 from app.core.config import settings
 from app.models import Transaction, AnomalyResult, RiskLevel
 
 logger = logging.getLogger(__name__)
 
+# Transient API failures (rate limits, timeouts, dropped connections, 5xx) are retried
+# with jittered exponential backoff before callers fall back to template content
+_RETRY = retry(
+    reraise=True,
+    stop=stop_after_attempt(3),
+    wait=wait_random_exponential(min=1, max=8),
+    retry=retry_if_exception_type((RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)),
+    before_sleep=before_sleep_log(logger, logging.WARNING)
+)
+
+# System messages are constant so every request shares the same cacheable prefix;
+# the message dicts themselves are shared rather than rebuilt per request
+_EMAIL_SYSTEM_MESSAGE = "You are a professional banking security AI that generates formal, clear, and actionable fraud alert emails. Always maintain banking industry communication standards."
+_PHONE_SYSTEM_MESSAGE = "You are an AI that generates professional, concise phone call scripts for banking security alerts. Scripts should be natural when spoken aloud and under 60 seconds."
+_ANALYSIS_SYSTEM_MESSAGE = "You are a financial security AI assistant that provides clear, professional analysis and explanations about financial transactions and fraud detection."
+_SYS_EMAIL = {"role": "system", "content": _EMAIL_SYSTEM_MESSAGE}
+_SYS_PHONE = {"role": "system", "content": _PHONE_SYSTEM_MESSAGE}
+_SYS_ANALYSIS = {"role": "system", "content": _ANALYSIS_SYSTEM_MESSAGE}
+
+# Risk levels whose alert content is written by the flagship model
+_PREMIUM_RISK_LEVELS = frozenset({RiskLevel.CRITICAL, RiskLevel.HIGH})
+
+# Fixed sampling seed so temperature-0 completions are as repeatable as the API allows
+_COMPLETION_SEED = 12345
+
+# Local prompt compression: filler phrases, bold header markers and redundant whitespace
+_FILLER_RE = re.compile(
+    r"\b(?:could you please|highly personalized|in other words|essentially|basically)\b,?[ \t]*",
+    re.IGNORECASE
+)
+_BOLD_HEADER_RE = re.compile(r"\*\*([^*\n]+)\*\*:")
+_HSPACE_RE = re.compile(r"[ \t]+")
+_BLANK_LINES_RE = re.compile(r"\n\s*\n+")
+
+
+def _compress_prompt(prompt: str) -> str:
+    """Shrink a user prompt without changing its meaning; line structure is kept"""
+    prompt = _FILLER_RE.sub("", prompt)
+    prompt = _BOLD_HEADER_RE.sub(r"\1:", prompt)
+    prompt = _HSPACE_RE.sub(" ", prompt)
+    prompt = _BLANK_LINES_RE.sub("\n", prompt)
+    return "\n".join(line.strip() for line in prompt.strip().split("\n"))
+
+
+# SUBJECT:/BODY: layout requested from the model for alert emails
+_EMAIL_RE = re.compile(
+    r"^\s*SUBJECT:\s*(?P<subject>.+?)\s*\n+\s*BODY:\s*(?P<body>.+)\Z",
+    re.DOTALL | re.IGNORECASE | re.MULTILINE
+)
+_DEFAULT_EMAIL_SUBJECT = "Security Alert: Transaction Anomaly Detected"
+_EMAIL_REFORMAT_PROMPT = "Reformat your previous answer using exactly:\nSUBJECT: ...\n\nBODY:\n..."
+
+# Flattens generated phone scripts onto one line for speech synthesis
+_NEWLINE_TABLE = str.maketrans({"\n": " ", "\r": " ", "\t": " "})
+_MULTISPACE_RE = re.compile(r" {2,}")
+
+
+def _bucket_amount(amount: float) -> str:
+    """Amount rounded to two significant figures, e.g. 199.99 and 200.01 -> 200"""
+    if amount < 1:
+        return "0"
+    return f"{round(amount, 1 - int(math.floor(math.log10(amount)))):.0f}"
+
+
+# Facts that identify who and where an alert is about; text is never reused across them
+_IDENTITY_FACTS = frozenset({"customer", "merchant", "location"})
+
+
+def _rebind_facts(response: str, cached_facts: Dict[str, str], facts: Dict[str, str]) -> Optional[str]:
+    """
+    Replace a cached transaction's facts with the new ones, or None if any cannot be found
+    Identity facts (customer, merchant, location) must match exactly instead of being swapped
+    """
+    if any(cached_facts.get(name) != facts.get(name) for name in _IDENTITY_FACTS):
+        return None
+    changed = [(old, facts.get(name, old)) for name, old in cached_facts.items() if facts.get(name, old) != old]
+    if any(old not in response for old, _ in changed):
+        return None
+    for old, new in changed:
+        response = response.replace(old, new)
+    return response
+
+
+def _location_context(transaction: Transaction) -> str:
+    """Where the transaction happened, flagging international locations, or '' if unknown"""
+    if not getattr(transaction, 'location', None):
+        return ""
+    city = transaction.location.get('city', 'Unknown')
+    state = transaction.location.get('state', 'Unknown')
+    if state in ['JP', 'UK', 'AE', 'RU', 'TH', 'CN', 'DE', 'FR']:
+        return f" from {city}, {state} (international location)"
+    return f" in {city}, {state}"
+
+
+@lru_cache(maxsize=64)
+def _humanize_enum(value: str) -> str:
+    """Enum value as words, e.g. unusual_amount -> unusual amount"""
+    return value.replace('_', ' ')
+
+
+@lru_cache(maxsize=64)
+def _pretty_enum(value: str) -> str:
+    """Enum value as a title, e.g. online_retail -> Online Retail"""
+    return value.replace('_', ' ').title()
+
+
+# Static instructions come first and per-transaction facts last, so the
+# shared prefix can be served from OpenAI's prompt cache
+_EMAIL_STATIC_PREFIX = """
+Write a highly personalized, professional security alert email for a flagged financial transaction. The customer, transaction details, security analysis and urgency are given at the end of this message.
+
+=== EMAIL REQUIREMENTS ===
+1. **Subject Line**: Professional banking subject (NO EMOJIS) mentioning the specific transaction concern
+2. **Personal Greeting**: Formal business greeting addressing the customer personally by name
+3. **Transaction Summary**: Present transaction details in organized, formal business format
+4. **Security Analysis**: Explain why transaction triggered security system using professional language
+5. **Action Required**: Use the urgency label given below - Provide clear, numbered action steps
+6. **Contact Information**: Multiple professional contact methods for immediate assistance
+7. **Professional Banking Footer**: Standard financial institution closing
+8. **Formatting**: Use **bold** for critical information (amounts, dates, merchant names)
+9. **NO EMOJIS**: Maintain strict professional banking communication standards
+
+=== TONE GUIDELINES ===
+- **STRICTLY PROFESSIONAL**: Banking industry standard communication
+- **NO EMOJIS OR CASUAL LANGUAGE**: Formal business correspondence only
+- **CLEAR AND DIRECT**: Structured information presentation with proper formatting
+- **SECURITY-FOCUSED**: Emphasize protective measures and fraud prevention
+- **ACTIONABLE**: Specific steps with clear instructions and contact information
+- **APPROPRIATELY URGENT**: Use the response tone given below for this risk level
+- **CUSTOMER-CENTRIC**: Protective and helpful while maintaining professional boundaries
+
+Format your response as:
+SUBJECT: [Your personalized subject line]
+
+BODY:
+[Your complete personalized email body]
+"""
+
+_PHONE_STATIC_PREFIX = """
+Generate a brief, professional phone call script for an automated security alert call about a flagged financial transaction. The customer and transaction details are given at the end of this message.
+
+Requirements:
+1. Keep the script under 60 seconds when spoken (approximately 150-180 words)
+2. Start with a clear identification of the caller as FinancePulse Security
+3. Explain the purpose of the call concisely
+4. Provide key transaction details
+5. Give clear next steps for both authorized and unauthorized transactions
+6. End with a professional closing
+7. Use natural, conversational language that sounds good when spoken
+8. Include a callback number for customer assistance
+9. Be appropriately urgent for the risk level given below
+
+The script should sound natural and professional when converted to speech. Use simple, clear language appropriate for a security notification call.
+"""
+
+# Full prompt templates: compressed once at import, filled per alert with format_map
+_EMAIL_TEMPLATE = _compress_prompt(_EMAIL_STATIC_PREFIX + """
+=== CUSTOMER INFORMATION ===
+Customer Name: {customer_name}
+Transaction ID: {transaction_id}
+
+=== TRANSACTION DETAILS ===
+- Amount: {amount}
+- Merchant: {merchant}
+- Date & Time: {timestamp}
+- Location: {location}
+- Category: {category}
+
+=== SECURITY ANALYSIS ===
+- Risk Level: {risk_level}
+- AI Confidence: {confidence}
+- Detected Issues: {anomaly_explanation}
+- Context: Transaction occurred{location_context}
+
+=== URGENCY ===
+- Action Required: {urgency}
+- Response Tone: Risk level {risk_level_lower} requires {action_tone} response tone
+- Security Advice: {security_advice}
+
+Make this email feel like it was written specifically for {customer_name} about this exact transaction at {merchant} for {amount}.
+""")
+
+_PHONE_TEMPLATE = _compress_prompt(_PHONE_STATIC_PREFIX + """
+Customer: {customer_name}
+Transaction: {amount} at {merchant} on {timestamp}
+Risk Level: {risk_level}
+""")
+
+# Plain-language descriptions of anomaly types for the email prompt
+_ANOMALY_TEMPLATES = {
+    "unusual_amount": "an unusually large transaction amount ({amount})",
+    "unusual_time": "a transaction made at an unusual time ({time})",
+    "unusual_location": "a transaction from an unexpected location",
+    "unusual_merchant": "a transaction with an uncommon merchant type ({merchant})",
+    "velocity_spike": "multiple rapid transactions in a short time period",
+    "amount_pattern": "a suspiciously round transaction amount that may indicate fraud",
+    "geographic_outlier": "a transaction from a location far from your usual spending areas",
+}
+
+# Risk level -> (urgency, action tone, security advice) for the email prompt
+_RISK_PROFILE = {
+    "CRITICAL": (
+        "URGENT ACTION REQUIRED", "immediate",
+        "Your card has been temporarily suspended for your protection. Please contact us immediately."
+    ),
+    "HIGH": (
+        "Immediate Attention Needed", "prompt",
+        "Please verify this transaction immediately and review your recent account activity."
+    ),
+    "MEDIUM": (
+        "Security Alert", "timely",
+        "Please review this transaction and contact us if you did not authorize it."
+    ),
+}
+_DEFAULT_PROFILE = (
+    "Transaction Notice", "your earliest convenience",
+    "This transaction has been flagged for your awareness. Please review when convenient."
+)
+
+# Fallback email subject, anomaly explanations and urgency by risk level
+_FALLBACK_SUBJECTS = {
+    "critical": "CRITICAL: Unusual {amount} transaction at {merchant} - {customer_name}",
+    "high": "HIGH RISK: {amount} transaction requires verification - {customer_name}",
+    "medium": "Security Alert: {amount} transaction at {merchant} - {customer_name}",
+}
+_FALLBACK_DEFAULT_SUBJECT = "Transaction Notice: {amount} at {merchant} - {customer_name}"
+
+_FALLBACK_ANOMALY_TEMPLATES = {
+    "unusual_amount": "The transaction amount ({amount}) is significantly higher than your typical spending",
+    "unusual_location": "This transaction was made from a location that differs from your usual spending areas",
+    "unusual_merchant": "The merchant type ({merchant}) is different from your typical purchases",
+}
+
+_FALLBACK_URGENCY = {
+    "CRITICAL": ("URGENT: Your account may be compromised. Please take immediate action.", "immediately"),
+    "HIGH": ("This transaction requires your immediate attention and verification.", "as soon as possible"),
+    "MEDIUM": ("Please review this transaction to ensure it was authorized by you.", "at your earliest convenience"),
+}
+_FALLBACK_DEFAULT_URGENCY = ("We're notifying you of this transaction for your awareness.", "when convenient")
+
+try:
+    import numpy as np
+    import faiss
+    from sentence_transformers import SentenceTransformer
+    SEMANTIC_CACHE_AVAILABLE = True
+except ImportError:
+    SEMANTIC_CACHE_AVAILABLE = False
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+class _SemanticCache:
+    """
+    Reuses completions whose canonical prompt key embeds close to an earlier one
+    Cached text is only served if the earlier transaction's facts can be swapped for the new ones
+    """
+    
+    def __init__(self, threshold: float = 0.9, top_k: int = 5, max_entries: int = 10_000):
+        self.threshold = threshold
+        self.top_k = top_k
+        self.max_entries = max_entries
+        self._model = None
+        self._index = None
+        self._entries: List[Tuple[str, Dict[str, str]]] = []
+    
+    def load(self):
+        """Load the embedding model and create the vector index (blocking)"""
+        self._model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+        self._index = faiss.IndexFlatIP(self._model.get_sentence_embedding_dimension())
+    
+    def _embed(self, text: str):
+        return self._model.encode([text], normalize_embeddings=True).astype(np.float32)
+    
+    async def lookup(self, canonical_key: str, facts: Dict[str, str]):
+        """Return (rebound response or None, key vector) for a canonical prompt key"""
+        vector = await asyncio.get_running_loop().run_in_executor(None, self._embed, canonical_key)
+        if self._index.ntotal:
+            scores, ids = self._index.search(vector, min(self.top_k, self._index.ntotal))
+            for score, i in zip(scores[0], ids[0]):
+                if score < self.threshold:
+                    break
+                response = _rebind_facts(*self._entries[i], facts)
+                if response is not None:
+                    return response, vector
+        return None, vector
+    
+    def add(self, vector, response: str, facts: Dict[str, str]):
+        # A flat index has no cheap removal, so stop growing once full
+        if len(self._entries) >= self.max_entries:
+            return
+        self._index.add(vector)
+        self._entries.append((response, facts))
+
+
+class _ResponseCache:
+    """In-memory LRU cache of completion results with a per-entry TTL"""
+    
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+    
+    @staticmethod
+    def make_key(model: str, system: str, prompt: str, max_tokens: int, temperature: float, top_p: Optional[float]) -> str:
+        """SHA-256 over every parameter that affects the completion output"""
+        payload = {
+            "model": model,
+            "sys": system,
+            "user": unicodedata.normalize("NFC", prompt).strip(),
+            "mt": max_tokens,
+            "t": temperature,
+            "p": top_p,
+        }
+        return hashlib.sha256(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)).hexdigest()
+    
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+    
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self._entries[key] = (time.monotonic() + (ttl or self.ttl), value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+class _RedisResponseCache:
+    """Shared second-level response cache in Redis; failures count as misses"""
+    
+    _PREFIX = "openai:completion:"
+    
+    def __init__(self, client, ttl: int = 3600):
+        self._client = client
+        self.ttl = ttl
+    
+    async def get(self, key: str) -> Optional[str]:
+        try:
+            raw = await self._client.get(self._PREFIX + key)
+            if raw is None:
+                return None
+            return orjson.loads(gzip.decompress(raw))["content"]
+        except Exception as e:
+            logger.warning(f"⚠️ Redis response cache read failed: {e}")
+            return None
+    
+    async def set(self, key: str, value: str):
+        try:
+            payload = gzip.compress(orjson.dumps({"content": value}), compresslevel=6)
+            await self._client.setex(self._PREFIX + key, self.ttl, payload)
+        except Exception as e:
+            logger.warning(f"⚠️ Redis response cache write failed: {e}")
+    
+    async def close(self):
+        await self._client.close()
+
 
 class OpenAIService:
     """OpenAI service for generating notification content"""
@@ -22,6 +401,15 @@ class OpenAIService:
     def __init__(self):
         self.client = None
         self.is_initialized = False
+        self._response_cache = _ResponseCache()
+        # Canonical alert key (bucketed amount, no ids or timestamps) -> (completion, facts it was written for)
+        self._canonical_cache = _ResponseCache()
+        self._semantic_cache: Optional[_SemanticCache] = None
+        self._redis_cache: Optional[_RedisResponseCache] = None
+        self._batch_sem = asyncio.Semaphore(settings.OPENAI_CONCURRENCY)
+        
+        # In-flight completions, shared by concurrent identical requests
+        self._inflight: Dict[str, asyncio.Task] = {}
         
     async def initialize(self) -> bool:
         """Initialize the OpenAI service"""
@@ -30,24 +418,32 @@ class OpenAIService:
                 logger.warning("OPENAI_API_KEY not configured, using fallback content generation")
                 return False
                 
-            # Initialize the OpenAI client
+            # Initialize the OpenAI client on an explicitly sized connection pool.
+            # Requests may legitimately queue for a connection, so there is no pool timeout.
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=1000,
+                    max_keepalive_connections=100,
+                    keepalive_expiry=60.0
+                ),
+                timeout=httpx.Timeout(30.0, connect=10.0, pool=None)
+            )
             self.client = AsyncOpenAI(
                 api_key=settings.OPENAI_API_KEY,
-                timeout=30.0
+                timeout=30.0,
+                max_retries=0,  # _RETRY handles retries, including stream opens
+                http_client=http_client
             )
             
-            # Test the client with a simple request
+            # Verify the API key and model with a metadata lookup instead of a paid generation
             try:
-                response = await self.client.chat.completions.create(
-                    model=settings.OPENAI_MODEL,
-                    messages=[{"role": "user", "content": "Test connection. Respond with 'OK'."}],
-                    max_tokens=10,
-                    temperature=0.1
-                )
+                model = await self.client.models.retrieve(settings.OPENAI_MODEL)
                 
-                if response and response.choices and response.choices[0].message.content:
+                if model and model.id:
                     self.is_initialized = True
                     logger.info("✅ OpenAI service initialized successfully")
+                    await self._init_semantic_cache()
+                    await self._init_redis_cache()
                     return True
                 else:
                     logger.error("Failed to get test response from OpenAI")
@@ -61,6 +457,63 @@ class OpenAIService:
             logger.error(f"Failed to initialize OpenAI service: {e}")
             return False
     
+    async def close(self):
+        """Close the OpenAI client and its connection pool"""
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+            self.is_initialized = False
+        if self._redis_cache is not None:
+            await self._redis_cache.close()
+            self._redis_cache = None
+    
+    async def _init_redis_cache(self):
+        """Connect the shared Redis response cache when enabled"""
+        if not settings.OPENAI_REDIS_CACHE:
+            return
+        if not REDIS_AVAILABLE:
+            logger.warning("Redis response cache enabled but redis is not installed")
+            return
+        client = aioredis.from_url(settings.REDIS_URL)
+        try:
+            await client.ping()
+            self._redis_cache = _RedisResponseCache(client, ttl=int(self._response_cache.ttl))
+            logger.info("✅ Redis response cache connected")
+        except Exception as e:
+            await client.close()
+            logger.error(f"Failed to connect Redis response cache: {e}")
+    
+    async def _init_semantic_cache(self):
+        """Load the semantic cache when enabled and its dependencies are installed"""
+        if not settings.OPENAI_SEMANTIC_CACHE:
+            return
+        if not SEMANTIC_CACHE_AVAILABLE:
+            logger.warning("Semantic cache enabled but sentence-transformers/faiss not installed")
+            return
+        try:
+            cache = _SemanticCache()
+            await asyncio.get_running_loop().run_in_executor(None, cache.load)
+            self._semantic_cache = cache
+            logger.info("✅ Semantic response cache ready")
+        except Exception as e:
+            logger.error(f"Failed to load semantic cache: {e}")
+    
+    @staticmethod
+    def _semantic_key(
+        kind: str,
+        transaction: Transaction,
+        anomaly_result: AnomalyResult,
+        customer_name: str,
+        detail: str = ""
+    ) -> str:
+        """Stable description of an alert, without per-transaction identifiers"""
+        anomaly_types = ", ".join(sorted(t.value for t in anomaly_result.anomaly_types))
+        return (
+            f"{kind} alert for {customer_name}: {anomaly_result.risk_level.value} risk, {anomaly_types}, "
+            f"{transaction.merchant_category.value} at {transaction.merchant_name}, "
+            f"about ${_bucket_amount(transaction.amount)}{detail}"
+        )
+    
     async def generate_email_content(
         self, 
         transaction: Transaction, 
@@ -78,26 +531,36 @@ class OpenAIService:
             # Create prompt for email generation
             prompt = self._build_email_prompt(transaction, anomaly_result, customer_name)
             
+            # Facts that differ between otherwise similar alerts
+            facts = {
+                "id": transaction.id,
+                "amount": f"${transaction.amount:.2f}",
+                "timestamp": transaction.timestamp.strftime("%B %d, %Y at %I:%M %p"),
+                "time": transaction.timestamp.strftime("%I:%M %p"),
+                "confidence": f"{anomaly_result.confidence_score * 100:.1f}%",
+                "customer": customer_name,
+                "merchant": transaction.merchant_name,
+                "location": _location_context(transaction),
+            }
+            
+            # The email also names the location and AI confidence, so similar alerts must share them
+            detail = (
+                f", located{_location_context(transaction) or ' nowhere in particular'}"
+                f", about {round(anomaly_result.confidence_score * 10) * 10}% confidence"
+            )
+            
             # Generate content using OpenAI
-            response = await self.client.chat.completions.create(
-                model=settings.OPENAI_MODEL,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a professional banking security AI that generates formal, clear, and actionable fraud alert emails. Always maintain banking industry communication standards."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                max_tokens=1500,
-                temperature=0.3,
-                top_p=0.9
+            content = await self._cached_completion(
+                _SYS_EMAIL,
+                prompt,
+                max_tokens=settings.OPENAI_MAX_TOKENS_EMAIL,
+                temperature=0,
+                semantic=(self._semantic_key("email", transaction, anomaly_result, customer_name, detail), facts),
+                model=self._select_model(anomaly_result),
+                expect=(_EMAIL_RE, _EMAIL_REFORMAT_PROMPT)
             )
             
-            if response and response.choices and response.choices[0].message.content:
-                content = response.choices[0].message.content.strip()
+            if content:
                 return self._parse_email_response(content)
             else:
                 logger.warning("Empty or invalid response from OpenAI, using fallback")
@@ -107,81 +570,389 @@ class OpenAIService:
             logger.error(f"Error generating email content with OpenAI: {e}")
             return self._fallback_email_content(transaction, anomaly_result, customer_name)
     
+    async def generate_emails_batch(
+        self,
+        items: Sequence[Tuple[Transaction, AnomalyResult, str]]
+    ) -> List[Tuple[str, str]]:
+        """
+        Generate email content for many (transaction, anomaly_result, customer_name) items concurrently
+        Returns (subject, body) per item, in the same order
+        """
+        # Identical alerts share one request
+        unique: Dict[tuple, Tuple[Transaction, AnomalyResult, str]] = {}
+        keys = []
+        for transaction, anomaly_result, customer_name in items:
+            key = (
+                transaction.id, customer_name, anomaly_result.risk_level,
+                anomaly_result.confidence_score, tuple(anomaly_result.anomaly_types)
+            )
+            keys.append(key)
+            unique.setdefault(key, (transaction, anomaly_result, customer_name))
+        
+        async def generate_one(item: Tuple[Transaction, AnomalyResult, str]) -> Tuple[str, str]:
+            async with self._batch_sem:
+                return await self.generate_email_content(*item)
+        
+        results = await asyncio.gather(*(generate_one(item) for item in unique.values()), return_exceptions=True)
+        
+        contents = {}
+        for key, item, result in zip(unique, unique.values(), results):
+            if isinstance(result, BaseException):
+                logger.error(f"Error generating batched email content: {result}")
+                result = self._fallback_email_content(*item)
+            contents[key] = result
+        
+        return [contents[key] for key in keys]
+    
     async def generate_phone_script(
         self, 
         transaction: Transaction, 
         anomaly_result: AnomalyResult,
-        customer_name: str = "Customer"
-    ) -> str:
-        """Generate phone call script for anomaly notification"""
+        customer_name: str = "Customer",
+        fallback: bool = True
+    ) -> Optional[str]:
+        """
+        Generate phone call script for anomaly notification
+        With fallback=False, failures return None instead of the template script
+        """
         if not self.is_initialized:
-            return self._fallback_phone_script(transaction, anomaly_result, customer_name)
+            return self._fallback_phone_script(transaction, anomaly_result, customer_name) if fallback else None
         
         try:
             # Create prompt for phone script generation
             prompt = self._build_phone_script_prompt(transaction, anomaly_result, customer_name)
             
+            # Facts that differ between otherwise similar alerts
+            facts = {
+                "amount": f"${transaction.amount:.2f}",
+                "timestamp": transaction.timestamp.strftime("%Y-%m-%d at %I:%M %p"),
+                "customer": customer_name,
+                "merchant": transaction.merchant_name,
+            }
+            
             # Generate content using OpenAI
-            response = await self.client.chat.completions.create(
-                model=settings.OPENAI_MODEL,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an AI that generates professional, concise phone call scripts for banking security alerts. Scripts should be natural when spoken aloud and under 60 seconds."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                max_tokens=400,
-                temperature=0.2
+            script = await self._cached_completion(
+                _SYS_PHONE,
+                prompt,
+                max_tokens=settings.OPENAI_MAX_TOKENS_PHONE,
+                temperature=0,
+                semantic=(self._semantic_key("phone", transaction, anomaly_result, customer_name), facts),
+                model=self._select_model(anomaly_result)
             )
             
-            if response and response.choices and response.choices[0].message.content:
-                script = response.choices[0].message.content.strip()
+            if script:
                 # Clean up the script for better speech synthesis
-                script = script.replace('\n\n', ' ').replace('\n', ' ')
+                script = _MULTISPACE_RE.sub(" ", script.translate(_NEWLINE_TABLE)).strip()
                 return script
             else:
                 logger.warning("Empty or invalid response from OpenAI, using fallback")
-                return self._fallback_phone_script(transaction, anomaly_result, customer_name)
                 
         except Exception as e:
             logger.error(f"Error generating phone script with OpenAI: {e}")
-            return self._fallback_phone_script(transaction, anomaly_result, customer_name)
+        
+        return self._fallback_phone_script(transaction, anomaly_result, customer_name) if fallback else None
+    
+    async def generate_phone_script_stream(
+        self,
+        transaction: Transaction,
+        anomaly_result: AnomalyResult,
+        customer_name: str = "Customer"
+    ) -> AsyncIterator[str]:
+        """
+        Stream the phone call script as it is generated so speech synthesis can start early
+        Cached scripts and fallbacks are yielded in one piece; closing the iterator early cancels the request
+        
+        Streamed deltas are raw: newlines become spaces, but repeated spaces are not collapsed
+        and the script is not stripped, so callers normalize the joined text themselves.
+        Only the exact in-memory response cache is consulted: unlike generate_phone_script
+        there is no in-flight sharing, Redis, bucket or semantic lookup, and concurrent
+        identical requests each open their own stream.
+        """
+        if not self.is_initialized:
+            yield self._fallback_phone_script(transaction, anomaly_result, customer_name)
+            return
+        
+        model = self._select_model(anomaly_result)
+        max_tokens = settings.OPENAI_MAX_TOKENS_PHONE
+        prompt = self._build_phone_script_prompt(transaction, anomaly_result, customer_name)
+        key = _ResponseCache.make_key(model, _PHONE_SYSTEM_MESSAGE, prompt, max_tokens, 0, None)
+        cached = self._response_cache.get(key)
+        if cached is not None:
+            yield _MULTISPACE_RE.sub(" ", cached.translate(_NEWLINE_TABLE)).strip()
+            return
+        
+        stream = None
+        parts = []
+        try:
+            stream = await self._chat(
+                model=model,
+                messages=[
+                    _SYS_PHONE,
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=max_tokens,
+                temperature=0,
+                seed=_COMPLETION_SEED,
+                stream=True
+            )
+            
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    delta = chunk.choices[0].delta.content
+                    parts.append(delta)
+                    yield delta.translate(_NEWLINE_TABLE)
+            
+            # Complete scripts are cached for the non-streaming path as well
+            script = "".join(parts).strip()
+            if script:
+                self._response_cache.set(key, script)
+            else:
+                logger.warning("Empty or invalid streamed phone script from OpenAI, using fallback")
+                yield self._fallback_phone_script(transaction, anomaly_result, customer_name)
+                
+        except Exception as e:
+            logger.error(f"Error streaming phone script with OpenAI: {e}")
+            if not parts:
+                yield self._fallback_phone_script(transaction, anomaly_result, customer_name)
+        finally:
+            if stream is not None:
+                await stream.close()
     
-    async def generate_custom_content(self, prompt: str, max_tokens: int = 1000) -> str:
-        """Generate custom content using OpenAI with a given prompt"""
+    async def generate_custom_content(
+        self,
+        prompt: str,
+        max_tokens: int = 1000,
+        instructions: Optional[str] = None,
+        fallback: bool = True
+    ) -> Optional[str]:
+        """
+        Generate custom content using OpenAI with a given prompt
+        Static `instructions` are sent as a system message ahead of the prompt so
+        repeated requests share a common prefix for provider-side prompt caching
+        With fallback=False, failures return None instead of a placeholder message
+        """
         if not self.is_initialized:
-            return "OpenAI service not available. Using fallback analysis."
+            return "OpenAI service not available. Using fallback analysis." if fallback else None
             
         try:
-            response = await self.client.chat.completions.create(
+            content = await self._cached_completion(
+                _SYS_ANALYSIS,
+                prompt,
+                max_tokens=max_tokens,
+                temperature=0,
+                instructions=instructions
+            )
+            
+            if content:
+                return content
+            else:
+                logger.warning("Empty or invalid response from OpenAI for custom content")
+                
+        except Exception as e:
+            logger.error(f"Error generating custom content with OpenAI: {e}")
+        
+        return "Unable to generate AI analysis at this time. Please try again later." if fallback else None
+    
+    @staticmethod
+    def _select_model(anomaly_result: AnomalyResult) -> str:
+        """Pick the flagship model for critical/high risk alerts and the cheaper one otherwise"""
+        if anomaly_result.risk_level in _PREMIUM_RISK_LEVELS or not settings.OPENAI_MODEL_CHEAP:
+            return settings.OPENAI_MODEL
+        return settings.OPENAI_MODEL_CHEAP
+    
+    async def _cached_completion(
+        self,
+        system: Dict[str, str],
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        top_p: Optional[float] = None,
+        instructions: Optional[str] = None,
+        semantic: Optional[Tuple[str, Dict[str, str]]] = None,
+        model: Optional[str] = None,
+        expect: Optional[Tuple["re.Pattern[str]", str]] = None
+    ) -> Optional[str]:
+        """
+        Run a chat completion, serving identical requests from the response cache
+        With `semantic` (canonical key, facts), near-duplicate alerts may reuse an earlier completion
+        With `expect` (pattern, reformat request), a response not matching the pattern is re-prompted once
+        Returns the stripped completion text, or None for an empty response
+        """
+        model = model or settings.OPENAI_MODEL
+        cache_system = f"{system['content']}\n{instructions}" if instructions else system["content"]
+        key = _ResponseCache.make_key(model, cache_system, prompt, max_tokens, temperature, top_p)
+        cached = self._response_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        # Join an identical completion that is already running instead of repeating it
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(
+                self._complete(key, model, system, prompt, max_tokens, temperature, top_p, instructions, semantic, expect)
+            )
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        
+        return await asyncio.shield(task)
+    
+    async def _complete(
+        self,
+        key: str,
+        model: str,
+        system: Dict[str, str],
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        top_p: Optional[float],
+        instructions: Optional[str],
+        semantic: Optional[Tuple[str, Dict[str, str]]],
+        expect: Optional[Tuple["re.Pattern[str]", str]] = None
+    ) -> Optional[str]:
+        """Request a completion after a cache miss and store the result"""
+        # Another replica, or this one before a restart, may already have the answer
+        if self._redis_cache is not None:
+            shared = await self._redis_cache.get(key)
+            if shared is not None:
+                self._response_cache.set(key, shared)
+                return shared
+        
+        # A similar alert (same customer, merchant, risk and amount bucket) can be reused
+        # once its transaction facts are swapped for this one's
+        canonical_key = None
+        if semantic:
+            canonical_key = hashlib.sha256(f"{model}|{max_tokens}|{semantic[0]}".encode()).hexdigest()
+            entry = self._canonical_cache.get(canonical_key)
+            if entry is not None:
+                rebound = _rebind_facts(*entry, semantic[1])
+                if rebound is not None:
+                    return rebound
+        
+        vector = None
+        if semantic and self._semantic_cache is not None:
+            hit, vector = await self._semantic_cache.lookup(*semantic)
+            if hit is not None:
+                return hit
+        
+        messages = [system]
+        if instructions:
+            messages.append({"role": "system", "content": instructions})
+        messages.append({"role": "user", "content": prompt})
+        
+        params = {"max_tokens": max_tokens, "temperature": temperature, "seed": _COMPLETION_SEED}
+        if top_p is not None:
+            params["top_p"] = top_p
+        
+        # An empty answer from the cheaper model is retried once on the flagship model
+        models = (model,) if model == settings.OPENAI_MODEL else (model, settings.OPENAI_MODEL)
+        content = None
+        for candidate in models:
+            response = await self._chat(model=candidate, messages=messages, **params)
+            if response and response.choices and response.choices[0].message.content:
+                content = response.choices[0].message.content.strip()
+                break
+            logger.warning(f"⚠️ Empty response from {candidate}")
+        
+        if not content:
+            return None
+        
+        # A well-formed but mis-laid-out answer is cheaper to fix than to replace with fallback content
+        if expect is not None and not expect[0].search(content):
+            logger.info(f"🔁 Response from {candidate} missed the expected format, re-prompting (retry_count=1)")
+            response = await self._chat(
+                model=candidate,
+                messages=[*messages, {"role": "assistant", "content": content}, {"role": "user", "content": expect[1]}],
+                **params
+            )
+            reformatted = response.choices[0].message.content.strip() if response and response.choices and response.choices[0].message.content else ""
+            if expect[0].search(reformatted):
+                content = reformatted
+            else:
+                logger.warning(f"⚠️ Re-prompted response from {candidate} still missed the expected format")
+        
+        self._response_cache.set(key, content)
+        if self._redis_cache is not None:
+            await self._redis_cache.set(key, content)
+        if canonical_key is not None:
+            self._canonical_cache.set(canonical_key, (content, semantic[1]))
+        if vector is not None:
+            self._semantic_cache.add(vector, content, semantic[1])
+        return content
+    
+    @_RETRY
+    async def _chat(self, **kwargs):
+        """
+        Chat completion with retries on transient failures
+        With stream=True only opening the stream is retried, before any chunk is yielded
+        """
+        return await self.client.chat.completions.create(**kwargs)
+    
+    @_RETRY
+    async def _open_speech(self, **kwargs):
+        """Open a streaming speech response with retries on transient failures; returns (manager, response)"""
+        manager = self.client.audio.speech.with_streaming_response.create(**kwargs)
+        return manager, await manager.__aenter__()
+    
+    async def stream_custom_content(self, prompt: str, max_tokens: int = 1000) -> AsyncIterator[str]:
+        """
+        Stream custom content from OpenAI chunk by chunk
+        Closing the iterator early cancels the underlying request
+        """
+        if not self.is_initialized:
+            yield "OpenAI service not available. Using fallback analysis."
+            return
+        
+        stream = None
+        produced = False
+        try:
+            stream = await self._chat(
                 model=settings.OPENAI_MODEL,
                 messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a financial security AI assistant that provides clear, professional analysis and explanations about financial transactions and fraud detection."
-                    },
+                    _SYS_ANALYSIS,
                     {
                         "role": "user",
                         "content": prompt
                     }
                 ],
                 max_tokens=max_tokens,
-                temperature=0.3
+                temperature=0,
+                seed=_COMPLETION_SEED,
+                stream=True
             )
             
-            if response and response.choices and response.choices[0].message.content:
-                return response.choices[0].message.content.strip()
-            else:
-                logger.warning("Empty or invalid response from OpenAI for custom content")
-                return "Unable to generate AI analysis at this time. Please try again later."
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    produced = True
+                    yield chunk.choices[0].delta.content
+            
+            if not produced:
+                logger.warning("Empty or invalid streamed response from OpenAI for custom content")
+                yield "Unable to generate AI analysis at this time. Please try again later."
                 
         except Exception as e:
-            logger.error(f"Error generating custom content with OpenAI: {e}")
-            return "Unable to generate AI analysis at this time. Please try again later."
+            logger.error(f"Error streaming custom content with OpenAI: {e}")
+            if not produced:
+                yield "Unable to generate AI analysis at this time. Please try again later."
+        finally:
+            if stream is not None:
+                await stream.close()
+    
+    async def stream_speech(self, text: str, voice: str = "alloy") -> AsyncIterator[bytes]:
+        """Stream synthesized MP3 speech for the given text as it is produced"""
+        if not self.is_initialized:
+            raise RuntimeError("OpenAI service not initialized")
+        
+        manager, response = await self._open_speech(
+            model="tts-1",
+            voice=voice,
+            input=text,
+            response_format="mp3"
+        )
+        try:
+            async for chunk in response.iter_bytes():
+                yield chunk
+        finally:
+            await manager.__aexit__(None, None, None)
     
     def _build_email_prompt(
         self, 
@@ -197,102 +968,40 @@ class OpenAIService:
         confidence = f"{anomaly_result.confidence_score * 100:.1f}%"
         
         # Format anomaly types in a user-friendly way
-        anomaly_descriptions = {
-            "unusual_amount": f"an unusually large transaction amount ({amount})",
-            "unusual_time": f"a transaction made at an unusual time ({transaction.timestamp.strftime('%I:%M %p')})",
-            "unusual_location": "a transaction from an unexpected location",
-            "unusual_merchant": f"a transaction with an uncommon merchant type ({merchant})",
-            "velocity_spike": "multiple rapid transactions in a short time period",
-            "amount_pattern": "a suspiciously round transaction amount that may indicate fraud",
-            "geographic_outlier": "a transaction from a location far from your usual spending areas"
-        }
-        
+        time_str = transaction.timestamp.strftime('%I:%M %p')
         detected_anomalies = []
         for anomaly_type in anomaly_result.anomaly_types:
-            description = anomaly_descriptions.get(anomaly_type.value, f"unusual {anomaly_type.value.replace('_', ' ')}")
-            detected_anomalies.append(description)
+            template = _ANOMALY_TEMPLATES.get(anomaly_type.value)
+            if template is None:
+                detected_anomalies.append(f"unusual {_humanize_enum(anomaly_type.value)}")
+            else:
+                detected_anomalies.append(template.format(amount=amount, merchant=merchant, time=time_str))
         
         anomaly_explanation = ", ".join(detected_anomalies) if detected_anomalies else "suspicious transaction patterns"
         
         # Determine urgency and action based on risk level
-        if risk_level == "CRITICAL":
-            urgency = "URGENT ACTION REQUIRED"
-            action_tone = "immediate"
-            security_advice = "Your card has been temporarily suspended for your protection. Please contact us immediately."
-        elif risk_level == "HIGH":
-            urgency = "Immediate Attention Needed"
-            action_tone = "prompt"
-            security_advice = "Please verify this transaction immediately and review your recent account activity."
-        elif risk_level == "MEDIUM":
-            urgency = "Security Alert"
-            action_tone = "timely"
-            security_advice = "Please review this transaction and contact us if you did not authorize it."
-        else:
-            urgency = "Transaction Notice"
-            action_tone = "your earliest convenience"
-            security_advice = "This transaction has been flagged for your awareness. Please review when convenient."
+        urgency, action_tone, security_advice = _RISK_PROFILE.get(risk_level, _DEFAULT_PROFILE)
         
         # Build location context if available
-        location_context = ""
-        if hasattr(transaction, 'location') and transaction.location:
-            city = transaction.location.get('city', 'Unknown')
-            state = transaction.location.get('state', 'Unknown')
-            if state in ['JP', 'UK', 'AE', 'RU', 'TH', 'CN', 'DE', 'FR']:
-                location_context = f" from {city}, {state} (international location)"
-            else:
-                location_context = f" in {city}, {state}"
+        location_context = _location_context(transaction)
         
-        prompt = f"""
-Write a highly personalized, professional security alert email for a {risk_level.lower()} risk financial transaction.
-
-=== CUSTOMER INFORMATION ===
-Customer Name: {customer_name}
-Transaction ID: {transaction.id}
-
-=== TRANSACTION DETAILS ===
-- Amount: {amount}
-- Merchant: {merchant}
-- Date & Time: {timestamp}
-- Location: {location_context if location_context else 'Standard location'}
-- Category: {transaction.merchant_category.value.replace('_', ' ').title()}
-
-=== SECURITY ANALYSIS ===
-- Risk Level: {risk_level}
-- AI Confidence: {confidence}
-- Detected Issues: {anomaly_explanation}
-- Context: Transaction occurred{location_context}
-
-=== EMAIL REQUIREMENTS ===
-1. **Subject Line**: Professional banking subject (NO EMOJIS) mentioning the specific transaction concern
-2. **Personal Greeting**: Formal business greeting addressing {customer_name} personally
-3. **Transaction Summary**: Present transaction details in organized, formal business format
-4. **Security Analysis**: Explain why transaction triggered security system using professional language
-5. **Action Required**: {urgency} - Provide clear, numbered action steps
-6. **Contact Information**: Multiple professional contact methods for immediate assistance
-7. **Professional Banking Footer**: Standard financial institution closing
-8. **Formatting**: Use **bold** for critical information (amounts, dates, merchant names)
-9. **NO EMOJIS**: Maintain strict professional banking communication standards
-
-=== TONE GUIDELINES ===
-- **STRICTLY PROFESSIONAL**: Banking industry standard communication
-- **NO EMOJIS OR CASUAL LANGUAGE**: Formal business correspondence only
-- **CLEAR AND DIRECT**: Structured information presentation with proper formatting
-- **SECURITY-FOCUSED**: Emphasize protective measures and fraud prevention
-- **ACTIONABLE**: Specific steps with clear instructions and contact information
-- **APPROPRIATELY URGENT**: Risk level {risk_level.lower()} requires {action_tone} response tone
-- **CUSTOMER-CENTRIC**: Protective and helpful while maintaining professional boundaries
-
-{security_advice}
-
-Format your response as:
-SUBJECT: [Your personalized subject line]
-
-BODY:
-[Your complete personalized email body]
-
-Make this email feel like it was written specifically for {customer_name} about this exact transaction at {merchant} for {amount}.
-"""
-        return prompt
+        return _EMAIL_TEMPLATE.format_map({
+            "customer_name": customer_name,
+            "transaction_id": transaction.id,
+            "amount": amount,
+            "merchant": merchant,
+            "timestamp": timestamp,
+            "location": location_context if location_context else 'Standard location',
+            "category": _pretty_enum(transaction.merchant_category.value),
+            "risk_level": risk_level,
+            "risk_level_lower": risk_level.lower(),
+            "confidence": confidence,
+            "anomaly_explanation": anomaly_explanation,
+            "location_context": location_context,
+            "urgency": urgency,
+            "action_tone": action_tone,
+            "security_advice": security_advice,
+        })
     
     def _build_phone_script_prompt(
         self, 
@@ -301,68 +1010,30 @@ Make this email feel like it was written specifically for {customer_name} about
         customer_name: str
     ) -> str:
         """Build prompt for phone script generation"""
-        risk_level = anomaly_result.risk_level.value.upper()
-        amount = f"${transaction.amount:.2f}"
-        merchant = transaction.merchant_name
-        timestamp = transaction.timestamp.strftime("%Y-%m-%d at %I:%M %p")
-        
-        prompt = f"""
-Generate a brief, professional phone call script for an automated security alert call about a {risk_level.lower()} risk financial transaction.
-
-Customer: {customer_name}
-Transaction: {amount} at {merchant} on {timestamp}
-Risk Level: {risk_level}
-
-Requirements:
-1. Keep the script under 60 seconds when spoken (approximately 150-180 words)
-2. Start with a clear identification of the caller as FinancePulse Security
-3. Explain the purpose of the call concisely
-4. Provide key transaction details
-5. Give clear next steps for both authorized and unauthorized transactions
-6. End with a professional closing
-7. Use natural, conversational language that sounds good when spoken
-8. Include a callback number for customer assistance
-9. Be appropriately urgent for {risk_level.lower()} risk level
-
-The script should sound natural and professional when converted to speech. Use simple, clear language appropriate for a security notification call.
-"""
-        return prompt
+        return _PHONE_TEMPLATE.format_map({
+            "customer_name": customer_name,
+            "amount": f"${transaction.amount:.2f}",
+            "merchant": transaction.merchant_name,
+            "timestamp": transaction.timestamp.strftime("%Y-%m-%d at %I:%M %p"),
+            "risk_level": anomaly_result.risk_level.value.upper(),
+        })
     
     def _parse_email_response(self, content: str) -> Tuple[str, str]:
         """Parse OpenAI response to extract subject and body"""
         try:
-            # Split content into subject and body
-            lines = content.strip().split('\n')
-            subject = ""
-            body = ""
-            body_started = False
-            
-            for line in lines:
-                line = line.strip()
-                if line.startswith("SUBJECT:"):
-                    subject = line.replace("SUBJECT:", "").strip()
-                elif line.startswith("BODY:"):
-                    body_started = True
-                elif body_started:
-                    body += line + "\n"
-                elif not subject and ":" in line and not body_started:
-                    # Might be a subject line without "SUBJECT:" prefix
-                    subject = line
-            
-            # Clean up body
-            body = body.strip()
+            match = _EMAIL_RE.search(content)
+            if match:
+                return match.group("subject").strip(), match.group("body").strip() or content
             
             # If no clear separation, try to identify subject as first line
-            if not subject and not body:
-                lines = content.strip().split('\n', 1)
-                subject = lines[0] if lines else "Security Alert: Transaction Anomaly Detected"
-                body = lines[1] if len(lines) > 1 else content
-            
-            return subject or "Security Alert: Transaction Anomaly Detected", body or content
+            subject, _, body = content.strip().partition('\n')
+            if subject.upper().startswith("SUBJECT:"):
+                subject = subject[len("SUBJECT:"):]
+            return subject.strip() or _DEFAULT_EMAIL_SUBJECT, body.strip() or content
             
         except Exception as e:
             logger.error(f"Error parsing email response: {e}")
-            return "Security Alert: Transaction Anomaly Detected", content
+            return _DEFAULT_EMAIL_SUBJECT, content
     
     def _fallback_email_content(
         self, 
@@ -377,46 +1048,27 @@ The script should sound natural and professional when converted to speech. Use s
         timestamp = transaction.timestamp.strftime("%B %d, %Y at %I:%M %p")
         
         # Create personalized subject based on transaction details
-        if anomaly_result.risk_level.value == "critical":
-            subject = f"CRITICAL: Unusual {amount} transaction at {merchant} - {customer_name}"
-        elif anomaly_result.risk_level.value == "high":
-            subject = f"HIGH RISK: {amount} transaction requires verification - {customer_name}"
-        elif anomaly_result.risk_level.value == "medium":
-            subject = f"Security Alert: {amount} transaction at {merchant} - {customer_name}"
-        else:
-            subject = f"Transaction Notice: {amount} at {merchant} - {customer_name}"
+        subject = _FALLBACK_SUBJECTS.get(anomaly_result.risk_level.value, _FALLBACK_DEFAULT_SUBJECT).format(
+            amount=amount, merchant=merchant, customer_name=customer_name
+        )
         
         # Get context about the anomaly
         anomaly_descriptions = []
         for anomaly_type in anomaly_result.anomaly_types:
-            if anomaly_type.value == "unusual_amount":
-                anomaly_descriptions.append(f"The transaction amount ({amount}) is significantly higher than your typical spending")
+            template = _FALLBACK_ANOMALY_TEMPLATES.get(anomaly_type.value)
+            if template is not None:
+                anomaly_descriptions.append(template.format(amount=amount, merchant=merchant))
             elif anomaly_type.value == "unusual_time":
                 hour = transaction.timestamp.hour
                 time_desc = "very early morning" if hour < 6 else "late night" if hour > 22 else "unusual"
                 anomaly_descriptions.append(f"This transaction occurred during {time_desc} hours ({transaction.timestamp.strftime('%I:%M %p')})")
-            elif anomaly_type.value == "unusual_location":
-                anomaly_descriptions.append("This transaction was made from a location that differs from your usual spending areas")
-            elif anomaly_type.value == "unusual_merchant":
-                anomaly_descriptions.append(f"The merchant type ({merchant}) is different from your typical purchases")
             else:
-                anomaly_descriptions.append(f"Unusual {anomaly_type.value.replace('_', ' ')} detected")
+                anomaly_descriptions.append(f"Unusual {_humanize_enum(anomaly_type.value)} detected")
         
         anomaly_explanation = ". ".join(anomaly_descriptions) if anomaly_descriptions else "Our AI system has flagged this transaction as potentially suspicious"
         
         # Determine urgency level
-        if risk_level == "CRITICAL":
-            urgency_message = "URGENT: Your account may be compromised. Please take immediate action."
-            action_urgency = "immediately"
-        elif risk_level == "HIGH":
-            urgency_message = "This transaction requires your immediate attention and verification."
-            action_urgency = "as soon as possible"
-        elif risk_level == "MEDIUM":
-            urgency_message = "Please review this transaction to ensure it was authorized by you."
-            action_urgency = "at your earliest convenience"
-        else:
-            urgency_message = "We're notifying you of this transaction for your awareness."
-            action_urgency = "when convenient"
+        urgency_message, action_urgency = _FALLBACK_URGENCY.get(risk_level, _FALLBACK_DEFAULT_URGENCY)
         
         body = f"""Dear {customer_name},
 
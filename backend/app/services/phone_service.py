@@ -5,12 +5,18 @@ Autonomous phone call service using Twilio Voice API with AI-generated scripts
 
 import logging
 import asyncio
+import hashlib
+import random
 import urllib.parse
-from typing import Optional, Dict, Any
+from functools import lru_cache
+from email.utils import parsedate_to_datetime
+from typing import Optional, Dict, Any, Tuple
 from datetime import datetime
 
+import httpx
+from cachetools import TTLCache
+
 try:
-    from twilio.rest import Client
     from twilio.twiml.voice_response import VoiceResponse
     TWILIO_AVAILABLE = True
 except ImportError:
@@ -24,16 +30,59 @@ from app.services.openai_service import openai_service
 
 logger = logging.getLogger(__name__)
 
+# How long a generated call script is reused for the same alert
+_SCRIPT_CACHE_TTL = 3600
+
+# Twilio REST API, called directly so requests stay on the event loop
+_TWILIO_API_BASE = "https://api.twilio.com/2010-04-01"
+
+# Twilio error codes worth retrying (rate limited, authentication hiccup); others such
+# as 21211 (invalid To number) fail the same way every time
+_TRANSIENT_TWILIO_ERRORS = frozenset({20429, 20003})
+
+# Exponential backoff between call attempts, in seconds
+_RETRY_BACKOFF_BASE = 0.2
+_RETRY_BACKOFF_CAP = 8.0
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Capped exponential delay plus up to 10% jitter, so concurrent retries spread out"""
+    delay = min(_RETRY_BACKOFF_CAP, _RETRY_BACKOFF_BASE * 2 ** attempt)
+    return delay + random.uniform(0, 0.1 * delay)
+
+
+@lru_cache(maxsize=2048)
+def _encode_script(script: str) -> str:
+    """Percent-encode a call script for a TwiML URL; scripts repeat across similar alerts"""
+    return urllib.parse.quote_from_bytes(script.encode('utf-8'), safe="")
+
+
+@lru_cache(maxsize=1024)
+def _render_twiml(script: str, voice: str) -> str:
+    """TwiML document that speaks a script"""
+    response = VoiceResponse()
+    response.say(script, voice=voice)
+    return str(response)
+
 
 class PhoneService:
     """Phone call service for voice notifications using Twilio"""
     
     def __init__(self):
-        self.twilio_client = None
+        self._http: Optional[httpx.AsyncClient] = None
         self.is_configured = False
         self.fallback_mode = False
+        
+        # Bounds Twilio requests in flight so call bursts don't run into rate limits
+        self._call_sem = asyncio.Semaphore(settings.TWILIO_MAX_CONCURRENT_CALLS)
         self.call_log = []
         
+        # Generated scripts keyed on risk level, amount bucket, merchant and customer
+        self._script_cache: TTLCache = TTLCache(maxsize=1024, ttl=_SCRIPT_CACHE_TTL)
+        
+        # In-flight script generations, shared by concurrent calls for the same alert
+        self._inflight_scripts: Dict[str, asyncio.Task] = {}
+        
     async def initialize(self) -> bool:
         """Initialize phone service with Twilio"""
         try:
@@ -73,7 +122,7 @@ class PhoneService:
             return False
             
         max_retries = 2
-        retry_delay = 5  # seconds
+        script = ""
         
         for attempt in range(max_retries + 1):
             try:
@@ -91,21 +140,24 @@ class PhoneService:
                 
                 success = call_result.get('success', False) if isinstance(call_result, dict) else call_result
                 call_sid = call_result.get('call_sid') if isinstance(call_result, dict) else None
+                retryable = call_result.get('retryable', False) if isinstance(call_result, dict) else False
                 
                 if success:
                     break  # Success, exit retry loop
-                elif attempt < max_retries:
-                    logger.warning(f"Call attempt {attempt + 1} failed, retrying in {retry_delay} seconds...")
+                elif attempt < max_retries and retryable:
+                    retry_delay = _backoff_delay(attempt)
+                    logger.warning(f"Call attempt {attempt + 1} failed, retrying in {retry_delay:.1f} seconds...")
                     await asyncio.sleep(retry_delay)
                     
             except Exception as e:
                 logger.error(f"Error in anomaly call attempt {attempt + 1}: {e}")
+                success = False
+                call_sid = None
+                retryable = True
                 if attempt < max_retries:
-                    logger.warning(f"Retrying call in {retry_delay} seconds...")
+                    retry_delay = _backoff_delay(attempt)
+                    logger.warning(f"Retrying call in {retry_delay:.1f} seconds...")
                     await asyncio.sleep(retry_delay)
-                else:
-                    success = False
-                    call_sid = None
             
             # Log the call attempt
             call_record = {
@@ -124,6 +176,10 @@ class PhoneService:
                 logger.info(f"📞 Anomaly notification call completed for {phone_number}")
             else:
                 logger.error(f"Failed to complete anomaly notification call for {phone_number}")
+            
+            # Permanent errors fail the same way on every attempt
+            if not retryable:
+                break
                 
         return success
     
@@ -159,7 +215,7 @@ class PhoneService:
                     'status': 'fallback_logged'
                 }
             
-            if not self.twilio_client:
+            if not self._http:
                 logger.error("Twilio client not initialized")
                 return {
                     'success': False,
@@ -171,31 +227,54 @@ class PhoneService:
             twiml_url = self._generate_twiml_url(script)
             
             # Make the call using Twilio
-            call = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: self.twilio_client.calls.create(
-                    to=phone_number,
-                    from_=settings.TWILIO_PHONE_NUMBER,
-                    url=twiml_url,
-                    status_callback=f"{settings.TWILIO_WEBHOOK_URL}/status" if settings.TWILIO_WEBHOOK_URL else None,
-                    status_callback_event=['completed', 'failed', 'busy', 'no-answer'],
-                    timeout=30
-                )
-            )
+            params = {
+                'To': phone_number,
+                'From': settings.TWILIO_PHONE_NUMBER,
+                'Url': twiml_url,
+                'StatusCallbackEvent': ['completed', 'failed', 'busy', 'no-answer'],
+                'Timeout': 30
+            }
+            if settings.TWILIO_WEBHOOK_URL:
+                params['StatusCallback'] = f"{settings.TWILIO_WEBHOOK_URL}/status"
+            async with self._call_sem:
+                response = await self._http.post("/Calls.json", data=params)
+            response.raise_for_status()
             
             # Store call SID for tracking
-            call_sid = call.sid
+            call_sid = response.json()['sid']
             
             logger.info(f"📞 REAL CALL initiated to {self._mask_phone_number(phone_number)}")
-            logger.info(f"📱 Call SID: {call.sid}")
+            logger.info(f"📱 Call SID: {call_sid}")
             logger.info(f"📝 Script: {script[:100]}...")
             
             return {
                 'success': True,
-                'call_sid': call.sid,
+                'call_sid': call_sid,
                 'status': 'initiated'
             }
             
+        except httpx.HTTPStatusError as e:
+            error_code = self._twilio_error_code(e.response)
+            logger.error(f"Twilio rejected call (error {error_code}): {e}")
+            return {
+                'success': False,
+                'call_sid': None,
+                'error': str(e),
+                'error_code': error_code,
+                'retryable': (
+                    error_code in _TRANSIENT_TWILIO_ERRORS
+                    or e.response.status_code == 429
+                    or e.response.status_code >= 500
+                )
+            }
+        except httpx.TransportError as e:
+            logger.error(f"Network error making Twilio call: {e}")
+            return {
+                'success': False,
+                'call_sid': None,
+                'error': str(e),
+                'retryable': True
+            }
         except Exception as e:
             logger.error(f"Error making Twilio call: {e}")
             return {
@@ -204,6 +283,14 @@ class PhoneService:
                 'error': str(e)
             }
     
+    @staticmethod
+    def _twilio_error_code(response: httpx.Response) -> Optional[int]:
+        """Twilio error code from a REST error response, if it has one"""
+        try:
+            return response.json().get('code')
+        except ValueError:
+            return None
+    
     async def _initialize_twilio(self) -> bool:
         """Initialize Twilio client with fallback mode"""
         try:
@@ -215,16 +302,24 @@ class PhoneService:
                 logger.error("Twilio phone number not configured")
                 return self._enable_fallback_mode("Missing Twilio phone number")
                 
-            # Initialize Twilio client
-            self.twilio_client = Client(
-                settings.TWILIO_ACCOUNT_SID,
-                settings.TWILIO_AUTH_TOKEN
+            # Initialize an async Twilio REST client on a pooled connection shared by all calls,
+            # sized to the request limit so every permitted request keeps its connection alive
+            self._http = httpx.AsyncClient(
+                base_url=f"{_TWILIO_API_BASE}/Accounts/{settings.TWILIO_ACCOUNT_SID}",
+                auth=(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN),
+                limits=httpx.Limits(
+                    max_connections=settings.TWILIO_MAX_CONCURRENT_CALLS,
+                    max_keepalive_connections=settings.TWILIO_MAX_CONCURRENT_CALLS
+                ),
+                timeout=30.0
             )
             
-            # Test the connection by fetching account info
-            await asyncio.get_event_loop().run_in_executor(
-                None, lambda: self.twilio_client.api.accounts(settings.TWILIO_ACCOUNT_SID).fetch()
+            # Test the connection by fetching account info; the account resource sits
+            # beside the base URL, which httpx always ends with a slash
+            response = await self._http.get(
+                f"{_TWILIO_API_BASE}/Accounts/{settings.TWILIO_ACCOUNT_SID}.json"
             )
+            response.raise_for_status()
             
             logger.info("Twilio client initialized successfully")
             return True
@@ -244,7 +339,7 @@ class PhoneService:
         """Generate TwiML URL for the call script"""
         try:
             # URL encode the script for safe transmission
-            encoded_script = urllib.parse.quote(script)
+            encoded_script = _encode_script(script)
             
             # If webhook URL is configured, use dynamic TwiML
             if settings.TWILIO_WEBHOOK_URL:
@@ -262,9 +357,7 @@ class PhoneService:
     def generate_twiml(self, script: str) -> str:
         """Generate TwiML response for a call"""
         try:
-            response = VoiceResponse()
-            response.say(script, voice=settings.TWILIO_TTS_VOICE)
-            return str(response)
+            return _render_twiml(script, settings.TWILIO_TTS_VOICE)
         except Exception as e:
             logger.error(f"Error generating TwiML: {e}")
             # Fallback TwiML
@@ -279,16 +372,70 @@ class PhoneService:
         customer_name: str
     ) -> str:
         """Generate call script with fallback if OpenAI fails"""
+        cache_key = self._script_cache_key(transaction, anomaly_result, customer_name)
+        amount = f"${transaction.amount:.2f}"
+        
+        # Reuse a recent script for the same alert, swapping in this transaction's amount
+        cached = self._script_cache.get(cache_key)
+        if cached is not None:
+            script, cached_amount = cached
+            if cached_amount == amount:
+                return script
+            if cached_amount in script:
+                return script.replace(cached_amount, amount)
+        
+        # Join an identical generation that is already running instead of repeating it
+        task = self._inflight_scripts.get(cache_key)
+        if task is None:
+            task = asyncio.create_task(
+                self._generate_script(transaction, anomaly_result, customer_name, cache_key)
+            )
+            self._inflight_scripts[cache_key] = task
+            task.add_done_callback(lambda _: self._inflight_scripts.pop(cache_key, None))
+        
+        script, cached_amount = await asyncio.shield(task)
+        if cached_amount == amount:
+            return script
+        if cached_amount in script:
+            return script.replace(cached_amount, amount)
+        
+        # The shared script words the amount differently, so it can't be adapted
+        script, _ = await self._generate_script(transaction, anomaly_result, customer_name, cache_key)
+        return script
+    
+    async def _generate_script(
+        self,
+        transaction: Transaction,
+        anomaly_result: AnomalyResult,
+        customer_name: str,
+        cache_key: str
+    ) -> Tuple[str, str]:
+        """Generate a call script and cache it along with the amount it mentions"""
+        amount = f"${transaction.amount:.2f}"
         try:
-            # Try to generate script using OpenAI (includes built-in fallback)
+            # Try to generate script using OpenAI
             script = await openai_service.generate_phone_script(
-                transaction, anomaly_result, customer_name
+                transaction, anomaly_result, customer_name, fallback=False
             )
-            return script
+            
+            # Only cache real OpenAI output, not a fallback for an unavailable or failed request
+            if script is None:
+                return self._generate_fallback_script(transaction, anomaly_result, customer_name), amount
+            self._script_cache[cache_key] = (script, amount)
+            return script, amount
         except Exception as e:
             logger.warning(f"OpenAI script generation failed, using basic fallback: {e}")
             # Fallback to basic script
-            return self._generate_fallback_script(transaction, anomaly_result, customer_name)
+            return self._generate_fallback_script(transaction, anomaly_result, customer_name), amount
+    
+    @staticmethod
+    def _script_cache_key(transaction: Transaction, anomaly_result: AnomalyResult, customer_name: str) -> str:
+        """Fingerprint of the alert details a call script depends on"""
+        fingerprint = (
+            f"{anomaly_result.risk_level.value}|{round(transaction.amount, -1)}|"
+            f"{transaction.merchant_name}|{customer_name}"
+        )
+        return hashlib.sha256(fingerprint.encode()).hexdigest()
     
     def _generate_fallback_script(self, transaction: Transaction, anomaly_result: AnomalyResult, customer_name: str) -> str:
         """Generate fallback script when AI generation fails"""
@@ -306,27 +453,39 @@ class PhoneService:
     async def get_call_status(self, call_sid: str) -> Optional[Dict[str, Any]]:
         """Get status of a Twilio call"""
         try:
-            if not self.twilio_client:
+            if not self._http:
                 return None
                 
-            call = await asyncio.get_event_loop().run_in_executor(
-                None, lambda: self.twilio_client.calls(call_sid).fetch()
-            )
+            async with self._call_sem:
+                response = await self._http.get(f"/Calls/{call_sid}.json")
+            response.raise_for_status()
+            call = response.json()
             
             return {
-                'sid': call.sid,
-                'status': call.status,
-                'duration': call.duration,
-                'start_time': call.start_time,
-                'end_time': call.end_time,
-                'price': call.price,
-                'direction': call.direction
+                'sid': call['sid'],
+                'status': call['status'],
+                'duration': call['duration'],
+                'start_time': self._parse_twilio_date(call['start_time']),
+                'end_time': self._parse_twilio_date(call['end_time']),
+                'price': call['price'],
+                'direction': call['direction']
             }
             
         except Exception as e:
             logger.error(f"Error fetching call status: {e}")
             return None
     
+    @staticmethod
+    def _parse_twilio_date(value: Optional[str]) -> Optional[datetime]:
+        """Parse an RFC 2822 date from the Twilio REST API"""
+        return parsedate_to_datetime(value) if value else None
+    
+    async def shutdown(self):
+        """Close the Twilio HTTP client"""
+        if self._http:
+            await self._http.aclose()
+            self._http = None
+    
     def _mask_phone_number(self, phone_number: str) -> str:
         """Mask phone number for logging privacy"""
         if len(phone_number) < 4:
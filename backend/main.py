@@ -6,6 +6,7 @@ Main FastAPI application with WebSocket streaming and HR data analysis
 
 import asyncio
 import logging
+import sys
 from contextlib import asynccontextmanager
 from typing import Dict, List, Optional
 
@@ -22,6 +23,9 @@ from app.services.anomaly_detector import AnomalyDetector
 from app.services.explanation_engine import ExplanationEngine
 from app.services.notification_service import notification_orchestrator
 from app.services.twilio_phone_service import enhanced_phone_service
+from app.services.phone_service import phone_service
+from app.services.intelligent_voice_caller import intelligent_voice_caller
+from app.services.openai_service import openai_service
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -59,6 +63,15 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("🛑 HR Audit backend shutting down...")
+    await notification_orchestrator.shutdown()
+    await intelligent_voice_caller.shutdown()
+    await phone_service.shutdown()
+    await openai_service.close()
+    
+    # The PDF service is imported on first use by the report routes; stop its workers if it was
+    pdf_module = sys.modules.get("app.services.pdf_service")
+    if pdf_module is not None:
+        pdf_module.pdf_service.shutdown()
 
 app = FastAPI(
     title="HR Audit API",
@@ -147,14 +160,10 @@ async def transaction_stream_worker():
                 )
                 anomaly_result.explanation = explanation
                 
-                # Process notifications for anomalies
+                # Queue notifications for anomalies; bursts are decided together in one batch
                 if settings.ENABLE_NOTIFICATIONS:
                     try:
-                        notification_results = await notification_orchestrator.process_anomaly_notification(
-                            transaction, anomaly_result
-                        )
-                        if any(notification_results.values()):
-                            logger.info(f"📲 Notifications sent for transaction {transaction.id}: {notification_results}")
+                        notification_orchestrator.submit_anomaly(transaction, anomaly_result)
                     except Exception as notification_error:
                         logger.error(f"Error processing notifications: {notification_error}")
             
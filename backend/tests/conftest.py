@@ -0,0 +1,44 @@
+"""
+Shared fixtures for the backend test suite
+"""
+
+from datetime import datetime
+
+import pytest
+
+from app.models import (
+    Transaction, AnomalyResult, RiskLevel, TransactionType, MerchantCategory
+)
+
+
+@pytest.fixture
+def make_transaction():
+    """Factory for transactions with sensible defaults"""
+    def factory(**overrides) -> Transaction:
+        data = {
+            "id": "txn_001",
+            "account_id": "acc_001",
+            "customer_id": "cust_001",
+            "amount": 1250.0,
+            "type": TransactionType.PURCHASE,
+            "merchant_name": "Electronics Plus",
+            "merchant_category": MerchantCategory.RETAIL,
+            "timestamp": datetime(2024, 1, 15, 3, 30),
+        }
+        data.update(overrides)
+        return Transaction(**data)
+    return factory
+
+
+@pytest.fixture
+def make_anomaly():
+    """Factory for anomaly results with sensible defaults"""
+    def factory(risk_level: RiskLevel = RiskLevel.HIGH, **overrides) -> AnomalyResult:
+        data = {
+            "is_anomaly": True,
+            "confidence_score": 0.92,
+            "risk_level": risk_level,
+        }
+        data.update(overrides)
+        return AnomalyResult(**data)
+    return factory
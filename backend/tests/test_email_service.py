@@ -0,0 +1,74 @@
+"""
+Tests for the batched SMTP send path of the email service
+"""
+
+import smtplib
+from email.mime.text import MIMEText
+
+import pytest
+
+from app.services.email_service import EmailService
+
+
+class FakeSMTP:
+    """SMTP stand-in that fails chosen recipients and can fail on QUIT"""
+
+    def __init__(self, fail_for=(), quit_error=None):
+        self.fail_for = set(fail_for)
+        self.quit_error = quit_error
+        self.sent = []
+        self.closed = False
+
+    def send_message(self, msg, from_addr, to_addrs):
+        if to_addrs[0] in self.fail_for:
+            raise smtplib.SMTPRecipientsRefused({to_addrs[0]: (550, b"rejected")})
+        self.sent.append(to_addrs[0])
+
+    def quit(self):
+        if self.quit_error is not None:
+            raise self.quit_error
+
+    def close(self):
+        self.closed = True
+
+
+def _messages(*recipients):
+    return [(MIMEText("body"), recipient) for recipient in recipients]
+
+
+@pytest.fixture
+def service():
+    return EmailService()
+
+
+def test_send_many_keeps_results_when_a_send_fails_partway(service, monkeypatch):
+    smtp = FakeSMTP(fail_for={"b@example.com"})
+    monkeypatch.setattr(service, "_smtp_connect", lambda: smtp)
+
+    results = service._smtp_send_many(_messages("a@example.com", "b@example.com", "c@example.com"))
+
+    assert results == [True, False, True]
+    assert smtp.sent == ["a@example.com", "c@example.com"]
+
+
+def test_send_many_keeps_results_when_quit_fails(service, monkeypatch):
+    smtp = FakeSMTP(quit_error=smtplib.SMTPServerDisconnected("connection lost"))
+    monkeypatch.setattr(service, "_smtp_connect", lambda: smtp)
+
+    results = service._smtp_send_many(_messages("a@example.com", "b@example.com"))
+
+    assert results == [True, True]
+    assert smtp.closed
+
+
+def test_send_many_closes_when_server_drops_mid_batch(service, monkeypatch):
+    smtp = FakeSMTP(
+        fail_for={"b@example.com", "c@example.com"},
+        quit_error=smtplib.SMTPServerDisconnected("connection lost")
+    )
+    monkeypatch.setattr(service, "_smtp_connect", lambda: smtp)
+
+    results = service._smtp_send_many(_messages("a@example.com", "b@example.com", "c@example.com"))
+
+    assert results == [True, False, False]
+    assert smtp.closed
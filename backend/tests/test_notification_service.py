@@ -0,0 +1,199 @@
+"""
+Tests for the notification orchestrator's batching, pacing and decision helpers
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.core.config import settings
+from app.models import CustomerContact, NotificationSettings, RiskLevel
+from app.services import notification_service
+from app.services.email_service import EmailPayload
+from app.services.notification_service import AsyncTokenBucket, NotificationOrchestrator
+
+
+def _fixed_utcnow(monkeypatch, hour: int):
+    """Pin the orchestrator's wall clock to the given UTC hour"""
+    class FixedDatetime(datetime):
+        @classmethod
+        def utcnow(cls):
+            return cls(2024, 1, 15, hour, 30)
+
+    monkeypatch.setattr(notification_service, "datetime", FixedDatetime)
+
+
+@pytest.fixture
+def orchestrator():
+    """An orchestrator with one customer and mocked senders"""
+    orchestrator = NotificationOrchestrator()
+    orchestrator.is_initialized = True
+    orchestrator._email_enabled_global = True
+    orchestrator._phone_enabled_global = True
+    orchestrator.customer_contacts["cust_001"] = CustomerContact(
+        customer_id="cust_001", name="John Doe",
+        email="john.doe@example.com", phone="+15550100"
+    )
+    orchestrator.customer_settings["cust_001"] = NotificationSettings(
+        customer_id="cust_001", quiet_hours_start=22, quiet_hours_end=8
+    )
+    orchestrator._rebuild_decision_arrays()
+    orchestrator._send_email_notification = AsyncMock(return_value=True)
+    orchestrator._send_phone_notification = AsyncMock(return_value=True)
+    return orchestrator
+
+
+# --- Email coalescing ---
+
+def test_coalesce_pending_groups_by_recipient(make_transaction, make_anomaly):
+    orchestrator = NotificationOrchestrator()
+    anomaly = make_anomaly()
+    payloads = [
+        EmailPayload(make_transaction(id="t1"), anomaly, "a@example.com"),
+        EmailPayload(make_transaction(id="t2"), anomaly, "b@example.com"),
+        EmailPayload(make_transaction(id="t3"), anomaly, "a@example.com"),
+        EmailPayload(make_transaction(id="t4"), anomaly, "a@example.com"),
+    ]
+    futures = [object() for _ in payloads]
+
+    groups = orchestrator._coalesce_pending(list(zip(payloads, futures)))
+
+    assert [payload.recipient_email for payload, _ in groups] == ["a@example.com", "b@example.com"]
+    first, first_futures = groups[0]
+    assert first is payloads[0]
+    assert first.related == [payloads[2], payloads[3]]
+    assert first_futures == [futures[0], futures[2], futures[3]]
+    assert groups[1] == (payloads[1], [futures[1]])
+    assert payloads[1].related == []
+
+
+# --- Token bucket ---
+
+@pytest.mark.asyncio
+async def test_token_bucket_allows_initial_burst():
+    bucket = AsyncTokenBucket(rpm=120)
+
+    start = time.monotonic()
+    for _ in range(120):
+        await bucket.acquire()
+
+    assert time.monotonic() - start < 0.1
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_paces_once_empty():
+    # 1200 requests per minute is one token every 50 ms
+    bucket = AsyncTokenBucket(rpm=1200)
+    bucket.tokens = 0.0
+
+    start = time.monotonic()
+    for _ in range(4):
+        await bucket.acquire()
+    elapsed = time.monotonic() - start
+
+    assert 0.18 <= elapsed < 0.5
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_paces_concurrent_callers():
+    bucket = AsyncTokenBucket(rpm=1200)
+    bucket.tokens = 0.0
+
+    start = time.monotonic()
+    await asyncio.gather(*(bucket.acquire() for _ in range(4)))
+
+    assert time.monotonic() - start >= 0.18
+
+
+# --- Quiet hours ---
+
+@pytest.mark.parametrize("start, end, quiet_hours", [
+    (22, 8, {22, 23, 0, 1, 2, 3, 4, 5, 6, 7, 8}),
+    (1, 5, {1, 2, 3, 4, 5}),
+    (23, 1, {23, 0, 1}),
+])
+def test_quiet_hours_wraps_midnight(monkeypatch, start, end, quiet_hours):
+    customer_settings = NotificationSettings(
+        customer_id="cust_001", quiet_hours_start=start, quiet_hours_end=end
+    )
+    for hour in range(24):
+        _fixed_utcnow(monkeypatch, hour)
+        assert NotificationOrchestrator._is_quiet_hours(customer_settings) == (hour in quiet_hours), hour
+
+
+def test_quiet_hours_unset_is_never_quiet(monkeypatch):
+    _fixed_utcnow(monkeypatch, 23)
+    assert not NotificationOrchestrator._is_quiet_hours(NotificationSettings(customer_id="cust_001"))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("hour, phone_sent", [(23, False), (3, False), (8, False), (9, True), (21, True)])
+async def test_batch_path_applies_quiet_hours_across_midnight(
+    orchestrator, monkeypatch, make_transaction, make_anomaly, hour, phone_sent
+):
+    _fixed_utcnow(monkeypatch, hour)
+
+    [results] = await orchestrator.process_anomaly_notifications_batch(
+        [make_transaction()], [make_anomaly(RiskLevel.CRITICAL)]
+    )
+
+    assert results == {"email": True, "phone": phone_sent}
+    assert orchestrator._send_phone_notification.await_count == int(phone_sent)
+
+
+# --- Response cache modes ---
+
+@pytest.mark.asyncio
+async def test_cache_enabled_reuses_results_for_duplicates(orchestrator, monkeypatch, make_transaction, make_anomaly):
+    monkeypatch.setattr(settings, "NOTIFICATION_CACHE_MODE", "enabled")
+    orchestrator._is_in_cooldown = lambda customer_id: False
+    transaction, anomaly = make_transaction(), make_anomaly(RiskLevel.MEDIUM)
+
+    first = await orchestrator.process_anomaly_notification(transaction, anomaly)
+    second = await orchestrator.process_anomaly_notification(transaction, anomaly)
+
+    assert first == second == {"email": True, "phone": False}
+    assert orchestrator._send_email_notification.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_replay_serves_recorded_results_without_sending(
+    orchestrator, monkeypatch, make_transaction, make_anomaly
+):
+    transaction, anomaly = make_transaction(), make_anomaly(RiskLevel.MEDIUM)
+    monkeypatch.setattr(settings, "NOTIFICATION_CACHE_MODE", "enabled")
+    recorded = await orchestrator.process_anomaly_notification(transaction, anomaly)
+    orchestrator._send_email_notification.reset_mock()
+
+    monkeypatch.setattr(settings, "NOTIFICATION_CACHE_MODE", "replay")
+    replayed = await orchestrator.process_anomaly_notification(transaction, anomaly)
+    unseen = await orchestrator.process_anomaly_notification(make_transaction(id="txn_002"), anomaly)
+    [unseen_batch] = await orchestrator.process_anomaly_notifications_batch(
+        [make_transaction(id="txn_003")], [anomaly]
+    )
+
+    assert replayed == recorded == {"email": True, "phone": False}
+    assert unseen == unseen_batch == {"email": False, "phone": False}
+    orchestrator._send_email_notification.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_cache_read_only_serves_hits_but_never_writes(orchestrator, monkeypatch, make_transaction, make_anomaly):
+    monkeypatch.setattr(settings, "NOTIFICATION_CACHE_MODE", "read_only")
+    orchestrator._is_in_cooldown = lambda customer_id: False
+    anomaly = make_anomaly(RiskLevel.MEDIUM)
+    cached_transaction = make_transaction(id="txn_cached")
+    cache_key, _ = orchestrator._check_response_cache(cached_transaction, anomaly)
+    orchestrator._response_cache[cache_key] = {"email": True, "phone": True}
+
+    hit = await orchestrator.process_anomaly_notification(cached_transaction, anomaly)
+    assert hit == {"email": True, "phone": True}
+    orchestrator._send_email_notification.assert_not_awaited()
+
+    miss = await orchestrator.process_anomaly_notification(make_transaction(id="txn_new"), anomaly)
+    assert miss == {"email": True, "phone": False}
+    assert orchestrator._send_email_notification.await_count == 1
+    assert len(orchestrator._response_cache) == 1
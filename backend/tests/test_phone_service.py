@@ -0,0 +1,112 @@
+"""
+Tests for the phone service's call script cache
+"""
+
+import asyncio
+
+import pytest
+
+from app.services import phone_service as phone_module
+from app.services.phone_service import PhoneService
+
+
+class FakeScriptGenerator:
+    """Stand-in for openai_service.generate_phone_script that counts calls"""
+
+    def __init__(self, fail: bool = False, gate: asyncio.Event = None):
+        self.fail = fail
+        self.gate = gate
+        self.calls = 0
+
+    async def __call__(self, transaction, anomaly_result, customer_name, fallback=True):
+        self.calls += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.fail:
+            return None
+        return f"Hi {customer_name}, please confirm the charge of ${transaction.amount:.2f} at {transaction.merchant_name}."
+
+
+@pytest.fixture
+def service():
+    return PhoneService()
+
+
+@pytest.fixture
+def generator(monkeypatch):
+    generator = FakeScriptGenerator()
+    monkeypatch.setattr(phone_module.openai_service, "generate_phone_script", generator)
+    return generator
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_rewrites_amount_within_bucket(service, generator, make_transaction, make_anomaly):
+    anomaly = make_anomaly()
+
+    first = await service._generate_script_with_fallback(make_transaction(amount=1231.0), anomaly, "John")
+    second = await service._generate_script_with_fallback(make_transaction(amount=1234.5), anomaly, "John")
+
+    assert generator.calls == 1
+    assert "$1231.00" in first
+    assert "$1234.50" in second and "$1231.00" not in second
+    assert second == first.replace("$1231.00", "$1234.50")
+
+
+@pytest.mark.asyncio
+async def test_different_bucket_generates_again(service, generator, make_transaction, make_anomaly):
+    anomaly = make_anomaly()
+
+    await service._generate_script_with_fallback(make_transaction(amount=1231.0), anomaly, "John")
+    await service._generate_script_with_fallback(make_transaction(amount=1290.0), anomaly, "John")
+
+    assert generator.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_fallback_scripts_are_not_cached(service, monkeypatch, make_transaction, make_anomaly):
+    generator = FakeScriptGenerator(fail=True)
+    monkeypatch.setattr(phone_module.openai_service, "generate_phone_script", generator)
+    transaction, anomaly = make_transaction(), make_anomaly()
+
+    first = await service._generate_script_with_fallback(transaction, anomaly, "John")
+    second = await service._generate_script_with_fallback(transaction, anomaly, "John")
+
+    assert first == second == service._generate_fallback_script(transaction, anomaly, "John")
+    assert generator.calls == 2
+    assert len(service._script_cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_generation_errors_are_not_cached(service, monkeypatch, make_transaction, make_anomaly):
+    async def broken(*args, **kwargs):
+        raise RuntimeError("upstream unavailable")
+
+    monkeypatch.setattr(phone_module.openai_service, "generate_phone_script", broken)
+    transaction, anomaly = make_transaction(), make_anomaly()
+
+    script = await service._generate_script_with_fallback(transaction, anomaly, "John")
+
+    assert script == service._generate_fallback_script(transaction, anomaly, "John")
+    assert len(service._script_cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_generation(service, monkeypatch, make_transaction, make_anomaly):
+    gate = asyncio.Event()
+    generator = FakeScriptGenerator(gate=gate)
+    monkeypatch.setattr(phone_module.openai_service, "generate_phone_script", generator)
+    anomaly = make_anomaly()
+    amounts = [1231.0, 1231.0, 1232.0, 1233.0, 1234.0]
+
+    callers = [
+        asyncio.create_task(service._generate_script_with_fallback(make_transaction(amount=amount), anomaly, "John"))
+        for amount in amounts
+    ]
+    await asyncio.sleep(0)
+    gate.set()
+    scripts = await asyncio.gather(*callers)
+
+    assert generator.calls == 1
+    for amount, script in zip(amounts, scripts):
+        assert f"${amount:.2f}" in script
+    assert not service._inflight_scripts
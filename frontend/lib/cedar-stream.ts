@@ -264,6 +264,19 @@ export class CedarStreamService implements CedarStream {
         timestamp: data.timestamp || new Date().toISOString(),
         source: 'legacy-websocket'
       };
+    } else if (data.type === 'notification_popup_batch') {
+      // Coalesced popups: replay each one as its own notification event
+      const timestamp = data.timestamp || new Date().toISOString();
+      (data.data || []).forEach((popup: any) => {
+        this.processCedarEvent({
+          type: 'notification_popup',
+          channel: 'notifications',
+          data: popup,
+          timestamp,
+          source: 'legacy-websocket'
+        });
+      });
+      return;
     } else if (data.type === 'notification_popup') {
       cedarEvent = {
         type: data.type,